@@ -0,0 +1,53 @@
+import argparse
+import json
+import sys
+
+# Fields where a larger number is worse, every other field is informational.
+COST_FIELDS = (
+    "best_us", "median_us", "mean_us", "p50_us", "p95_us",
+    "allocated_bytes", "resident_bytes", "compact_us", "compact_bytes"
+)
+
+def load(path: str) -> dict[tuple[str, str], dict[str, object]]:
+    with open(path) as file:
+        results = json.load(file)
+
+    return {
+        (suite, entry["name"]): entry
+        for suite, entries in results["suites"].items()
+        for entry in entries
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change reported as a regression")
+    args = parser.parse_args()
+
+    baseline, current = load(args.baseline), load(args.current)
+    regressions = 0
+
+    for key, entry in current.items():
+        if not (previous := baseline.get(key)):
+            continue
+
+        for field in COST_FIELDS:
+            old, new = previous.get(field), entry.get(field)
+
+            if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or old <= 0:
+                continue
+
+            change = (new - old) / old
+            marker = ""
+
+            if change > args.threshold:
+                regressions += 1
+                marker = "  REGRESSION"
+
+            print(f"{key[0]:>9}  {key[1]:<45} {field:<16} {old:>14.1f} -> {new:>14.1f} {change:+7.1%}{marker}")
+
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
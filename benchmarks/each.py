@@ -0,0 +1,48 @@
+from harness import timed, page
+import json
+
+from pyweb import html
+from pyweb.dom import create_renderer
+from pyweb.signals import signal
+from pyweb.each import each
+
+def row(item: dict[str, object]) -> html.WebElement:
+    return html.li(html.span(str(item["text"])), onclick=lambda: None)
+
+def run(number: int = 10) -> list[dict[str, object]]:
+    results: list[dict[str, object]] = []
+
+    for size in (1000, 10000):
+        for keyed in (False, True):
+            key = (lambda item: item["id"]) if keyed else None
+            label = "keyed" if keyed else "unkeyed"
+
+            def render():
+                with page():
+                    items = signal([{ "id": i, "text": f"row {i}" } for i in range(size)])
+                    create_renderer(html.ul(each(items, row, key))).render()
+
+            results.append(timed(f"each render {size} {label}", render, number, size=size, keyed=keyed))
+
+            with page():
+                items = signal([{ "id": i, "text": f"row {i}" } for i in range(size)])
+                renderer = create_renderer(html.ul(each(items, row, key)))
+                renderer.render()
+                counter = [size]
+
+                def append():
+                    counter[0] += 1
+                    items(lambda rows: [*rows, { "id": counter[0], "text": "new" }])
+                    renderer.update()
+
+                def rotate():
+                    items(lambda rows: [*rows[1:], rows[0]])
+                    renderer.update()
+
+                results.append(timed(f"each append to {size} {label}", append, number, size=size, keyed=keyed))
+                results.append(timed(f"each rotate {size} {label}", rotate, number, size=size, keyed=keyed))
+
+    return results
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
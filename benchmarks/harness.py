@@ -0,0 +1,46 @@
+from typing import Callable, Any, Iterator
+from contextlib import contextmanager
+from timeit import repeat
+import statistics
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pyweb.http import AppCurrentPage
+from pyweb.page_info import page_scope
+
+def timed(name: str, funct: Callable[[], Any], number: int, rounds: int = 5, **extra: Any) -> dict[str, Any]:
+    # The best round is the one least disturbed by the rest of the machine,
+    # the median shows how noisy the runs were.
+    times = [time / number * 1e6 for time in repeat(funct, number=number, repeat=rounds)]
+
+    return {
+        "name": name,
+        **extra,
+        "best_us": min(times),
+        "median_us": statistics.median(times),
+    }
+
+def latencies(name: str, times: list[float], **extra: Any) -> dict[str, Any]:
+    samples = sorted(time * 1e6 for time in times)
+
+    return {
+        "name": name,
+        **extra,
+        "mean_us": statistics.mean(samples),
+        "p50_us": samples[len(samples) // 2],
+        "p95_us": samples[int(len(samples) * 0.95)],
+    }
+
+@contextmanager
+def page() -> Iterator[AppCurrentPage]:
+    with page_scope(AppCurrentPage()) as current:
+        yield current
+
+def resident_memory() -> int | None:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,69 @@
+from harness import latencies
+import asyncio
+import time
+import json
+import re
+
+import falcon.testing as testing # type: ignore
+from pyweb import html, protocol
+from pyweb.http import create_app, WebApp
+from pyweb.signals import signal
+from pyweb.each import each
+
+def create_benchmark_app() -> WebApp:
+    app = create_app(max_sessions=100000)
+
+    @app.page("/")
+    def home(request): # type: ignore
+        count = signal(0)
+        items = signal([f"item {i}" for i in range(100)])
+
+        return html.div(
+            html.h1("Count is ", count),
+            html.ul(each(items, lambda item: html.li(item))),
+            html.button("Add", onclick=lambda: count(lambda value: value + 1)),
+        )
+
+    return app
+
+async def measure_get(app: WebApp, number: int) -> list[float]:
+    samples: list[float] = []
+
+    async with testing.ASGIConductor(app.build()) as conductor:
+        for _ in range(number):
+            start = time.perf_counter()
+            await conductor.get("/")
+            samples.append(time.perf_counter() - start)
+
+    return samples
+
+async def measure_round_trip(app: WebApp, number: int) -> list[float]:
+    samples: list[float] = []
+
+    async with testing.ASGIConductor(app.build()) as conductor:
+        text = (await conductor.get("/")).text
+        session_id = re.search(r'name="pyweb-session" content="([^"]+)"', text).group(1) # type: ignore
+        button = int(re.search(r'<button data-pw="(\d+)"', text).group(1)) # type: ignore
+        query = f"id={session_id}&v={protocol.PROTOCOL_VERSION}"
+
+        async with conductor.simulate_ws("/", query_string=query) as socket:
+            click = json.dumps([protocol.TRIGGER, button, "onclick"])
+
+            for _ in range(number):
+                start = time.perf_counter()
+                await socket.send_text(click)
+                await socket.receive_text()
+                samples.append(time.perf_counter() - start)
+
+    return samples
+
+def run(number: int = 500) -> list[dict[str, object]]:
+    app = create_benchmark_app()
+
+    return [
+        latencies("GET page", asyncio.run(measure_get(app, number)), samples=number),
+        latencies("event to patch round trip", asyncio.run(measure_round_trip(app, number)), samples=number),
+    ]
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
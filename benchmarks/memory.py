@@ -0,0 +1,54 @@
+from harness import resident_memory
+from latency import create_benchmark_app
+import tracemalloc
+import asyncio
+import json
+import gc
+
+import falcon.testing as testing # type: ignore
+
+async def open_sessions(count: int, trace: bool) -> tuple[int, int | None, float]:
+    app = create_benchmark_app()
+
+    async with testing.ASGIConductor(app.build()) as conductor:
+        await conductor.get("/")
+        gc.collect()
+
+        # tracemalloc has a large overhead of its own, so resident memory
+        # is measured in a separate run without it.
+        if trace:
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+
+        resident_before = resident_memory()
+
+        for _ in range(count):
+            await conductor.get("/")
+
+        gc.collect()
+        resident_after = resident_memory()
+
+        if trace:
+            after = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+        else:
+            allocated = 0
+
+    resident = resident_after - resident_before if resident_before and resident_after else None
+    return allocated, resident, app.sessions.memory_usage() / len(app.sessions)
+
+def run(count: int = 1000) -> list[dict[str, object]]:
+    allocated, _, estimated = asyncio.run(open_sessions(count, trace=True))
+    _, resident, _ = asyncio.run(open_sessions(count, trace=False))
+
+    return [{
+        "name": "memory per session",
+        "sessions": count,
+        "allocated_bytes": allocated / count,
+        "estimated_bytes": estimated,
+        "resident_bytes": resident / count if resident is not None else None,
+    }]
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,79 @@
+from timeit import timeit
+import zlib
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pyweb import protocol
+
+# The text protocol that shipped before version 1, kept here to compare against.
+def legacy_encode_patches(patches: list[list[object]]) -> str:
+    names = ["text", "attr", "insert", "replace", "remove", "move"]
+    return "patch$" + json.dumps([[names[patch[0]], *patch[1:]] for patch in patches]) # type: ignore
+
+def legacy_encode_trigger(node_id: int, attr: str, args: list[object]) -> str:
+    return f"trigger${node_id}@{attr}$" + json.dumps(args)
+
+def legacy_decode_trigger(text: str) -> tuple[str, list[object]]:
+    index = text.index("$")
+    args = text[index + 1:].split("$")
+    return args[0], json.loads(args[1])
+
+def deflated_size(text: str, repeat: int = 20) -> float:
+    # permessage-deflate keeps one raw deflate stream per connection, so
+    # a message that is sent repeatedly is measured as a steady state.
+    compressor = zlib.compressobj(wbits=-15)
+    total = 0
+
+    for _ in range(repeat):
+        total += len(compressor.compress(text.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH))
+
+    return total / repeat
+
+def measure(name: str, legacy: str, compact: str, legacy_funct, compact_funct, number: int) -> dict[str, object]: # type: ignore
+    return {
+        "name": name,
+        "legacy_bytes": len(legacy.encode()),
+        "compact_bytes": len(compact.encode()),
+        "legacy_deflated_bytes": deflated_size(legacy),
+        "compact_deflated_bytes": deflated_size(compact),
+        "legacy_us": timeit(legacy_funct, number=number) / number * 1e6,
+        "compact_us": timeit(compact_funct, number=number) / number * 1e6,
+    }
+
+def run(number: int = 2000) -> list[dict[str, object]]:
+    counter = [[protocol.TEXT, 2, 0, "The count is 12"]]
+    rows = [
+        [protocol.INSERT, 7, i, f'<li data-pw="{100 + i}">row number {i}</li>']
+        for i in range(100)
+    ]
+    trigger = (12, "oninput", ["search term"])
+
+    compact_trigger = json.dumps([protocol.TRIGGER, *trigger], separators=(",", ":"))
+    legacy_trigger = legacy_encode_trigger(*trigger)
+
+    return [
+        measure(
+            "encode counter patch",
+            legacy_encode_patches(counter), protocol.encode(protocol.PATCH, counter),
+            lambda: legacy_encode_patches(counter), lambda: protocol.encode(protocol.PATCH, counter),
+            number
+        ),
+        measure(
+            "encode 100 row inserts",
+            legacy_encode_patches(rows), protocol.encode(protocol.PATCH, rows),
+            lambda: legacy_encode_patches(rows), lambda: protocol.encode(protocol.PATCH, rows),
+            number
+        ),
+        measure(
+            "decode input trigger",
+            legacy_trigger, compact_trigger,
+            lambda: legacy_decode_trigger(legacy_trigger), lambda: protocol.decode(compact_trigger),
+            number * 10
+        ),
+    ]
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,61 @@
+from harness import timed, page
+import random
+import json
+
+from pyweb import html
+from pyweb.dom import create_renderer
+from pyweb.signals import signal, Signal
+
+def build_tree(rows: int, density: float, seed: int = 0) -> tuple[html.WebElement, list[Signal[int]]]:
+    rng = random.Random(seed)
+    signals: list[Signal[int]] = []
+
+    def cell(index: int) -> html.WebElementChild:
+        if rng.random() < density:
+            signals.append(value := signal(index))
+            return html.span("Value ", value)
+
+        return html.span(f"Value {index}")
+
+    tree = html.div(
+        html.h1("Benchmark"),
+        html.ul(*(
+            html.li(cell(i), html.small("static text"), class_name="row")
+            for i in range(rows)
+        ))
+    )
+
+    return tree, signals
+
+def run(number: int = 20) -> list[dict[str, object]]:
+    results: list[dict[str, object]] = []
+
+    for rows in (100, 1000, 5000):
+        for density in (0.0, 0.1, 0.5, 1.0):
+            scale = max(1, number * 100 // rows)
+
+            def render():
+                with page():
+                    tree, _ = build_tree(rows, density)
+                    create_renderer(tree).render()
+
+            results.append(timed(
+                f"render {rows} rows, {int(density * 100)}% reactive", render, scale,
+                rows=rows, density=density
+            ))
+
+        with page():
+            tree, signals = build_tree(rows, 0.5)
+            renderer = create_renderer(tree)
+            renderer.render()
+
+            def update():
+                signals[len(signals) // 2](lambda value: value + 1)
+                renderer.update()
+
+            results.append(timed(f"update one of {rows} rows", update, number * 50, rows=rows))
+
+    return results
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+import subprocess
+import argparse
+import platform
+import json
+import sys
+import os
+
+import render, each, styles, latency, memory, protocol
+
+SUITES = {
+    "render": render.run,
+    "each": each.run,
+    "styles": styles.run,
+    "latency": latency.run,
+    "memory": memory.run,
+    "protocol": protocol.run,
+}
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(__file__),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the pyweb benchmarks.")
+    parser.add_argument("suites", nargs="*", help=f"any of {', '.join(SUITES)}, all of them by default")
+    parser.add_argument("-o", "--output", help="write the results to this file instead of stdout")
+    args = parser.parse_args()
+
+    if unknown := [name for name in args.suites if name not in SUITES]:
+        parser.error(f"unknown suites: {', '.join(unknown)}")
+
+    results: dict[str, object] = {
+        "commit": current_commit(),
+        "date": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "suites": {},
+    }
+
+    for name in args.suites or SUITES:
+        print(f"running {name}", file=sys.stderr)
+        results["suites"][name] = SUITES[name]() # type: ignore
+
+    text = json.dumps(results, indent=2)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
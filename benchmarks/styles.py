@@ -0,0 +1,34 @@
+from harness import timed
+import json
+
+from pyweb.styles import style, compile_styles
+
+def stylesheet(index: int) -> dict[str, object]:
+    return {
+        "color": f"#{index % 4096:03x}",
+        "padding": f"{index % 16}px",
+        "display": "flex",
+        ":hover": { "color": "red", "border": f"{index % 3}px solid black" },
+        "@media (max-width: 600px)": { "display": "block" },
+    }
+
+def run(number: int = 20) -> list[dict[str, object]]:
+    results: list[dict[str, object]] = []
+
+    for count in (10, 100, 1000):
+        sheets = [stylesheet(i) for i in range(count)]
+        styles = [style(sheet) for sheet in sheets] # type: ignore
+
+        results.append(timed(
+            f"style create {count}", lambda: [style(sheet) for sheet in sheets], # type: ignore
+            max(1, number * 100 // count), count=count
+        ))
+        results.append(timed(
+            f"compile_styles {count}", lambda: compile_styles(styles),
+            max(1, number * 100 // count), count=count
+        ))
+
+    return results
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
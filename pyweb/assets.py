@@ -0,0 +1,57 @@
+from .styles import content_hash
+import falcon # type: ignore
+import gzip
+
+try:
+    import brotli # type: ignore
+except ImportError:
+    brotli = None
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+def accepted_encodings(header: str | None) -> set[str]:
+    encodings: set[str] = set()
+
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+
+        if params.replace(" ", "") not in ("q=0", "q=0.0"):
+            encodings.add(name.strip().lower())
+
+    return encodings
+
+class StaticAsset:
+    def __init__(self, content: str, content_type: str) -> None:
+        data = content.encode()
+
+        self.content_type = content_type
+        self.hash = content_hash(content)
+        self.etag = f'"{self.hash}"'
+
+        # Compressed once up front, requests only pick a variant.
+        self.variants: dict[str, bytes] = {}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(data) # type: ignore
+        self.variants["gzip"] = gzip.compress(data, 9, mtime=0)
+        self.variants["identity"] = data
+
+    async def on_get(self, req: falcon.Request, res: falcon.Response):
+        res.cache_control = [IMMUTABLE_CACHE]
+        res.etag = self.etag
+        res.vary = ["Accept-Encoding"]
+
+        if req.get_header("If-None-Match") == self.etag:
+            res.status = falcon.HTTP_304
+            return
+
+        res.status = falcon.HTTP_200
+        res.content_type = self.content_type
+
+        accepted = accepted_encodings(req.get_header("Accept-Encoding"))
+        for encoding, data in self.variants.items():
+            if encoding in accepted or encoding == "identity":
+                if encoding != "identity":
+                    res.set_header("Content-Encoding", encoding)
+
+                res.data = data
+                return
@@ -0,0 +1,33 @@
+from typing import Hashable
+from collections import OrderedDict
+
+class CachedPage:
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes, etag: str) -> None:
+        self.body = body
+        self.etag = etag
+
+class PageCache:
+    def __init__(self, max_entries: int = 128) -> None:
+        self.max_entries = max_entries
+        self.pages: OrderedDict[Hashable, CachedPage] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def get(self, key: Hashable) -> CachedPage | None:
+        if (page := self.pages.get(key)) is not None:
+            self.pages.move_to_end(key)
+
+        return page
+
+    def put(self, key: Hashable, page: CachedPage) -> None:
+        self.pages[key] = page
+        self.pages.move_to_end(key)
+
+        while len(self.pages) > self.max_entries:
+            self.pages.popitem(last=False)
+
+    def clear(self) -> None:
+        self.pages.clear()
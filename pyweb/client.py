@@ -0,0 +1,113 @@
+from . import protocol
+
+CLIENT_SOURCE = """
+    const pwSession = document.querySelector('meta[name="pyweb-session"]').content;
+
+    const pwNode = id => id === 0 ? document.body : document.querySelector(`[data-pw="${id}"]`);
+
+    const pwParse = html => {
+        const template = document.createElement("template");
+        template.innerHTML = html;
+        return template.content.firstChild;
+    };
+
+    const pwPatch = patch => {
+        const [op, id] = patch;
+        const node = pwNode(id);
+
+        if (op === TEXT) {
+            node.childNodes[patch[2]].nodeValue = patch[3];
+        } else if (op === ATTR) {
+            const [, , name, value] = patch;
+
+            if (value === null) node.removeAttribute(name);
+            else node.setAttribute(name, value === true ? "" : value);
+
+            if (name === "value" || name === "checked") {
+                node[name] = name === "checked" ? value !== null : (value ?? "");
+            }
+        } else if (op === INSERT) {
+            node.insertBefore(pwParse(patch[3]), node.childNodes[patch[2]] ?? null);
+        } else if (op === REPLACE) {
+            node.replaceChild(pwParse(patch[3]), node.childNodes[patch[2]]);
+        } else if (op === REMOVE) {
+            node.removeChild(node.childNodes[patch[2]]);
+        } else if (op === MOVE) {
+            node.insertBefore(node.childNodes[patch[2]], node.childNodes[patch[3]]);
+        }
+    };
+
+    window.ws = new WebSocket(
+        window.location.protocol.replace("http", "ws") + "//" + window.location.host +
+        window.location.pathname + "?id=" + pwSession + "&v=" + PROTOCOL_VERSION
+    );
+
+    const pwTimers = new Map();
+
+    const pwSend = (element, name, args) => {
+        const message = [TRIGGER, +element.dataset.pw, name];
+        if (args) message.push(args);
+        ws.send(JSON.stringify(message));
+    };
+
+    const pwThrottle = (key, ms, send) => {
+        const timer = pwTimers.get(key);
+        if (timer) {
+            timer.send = send;
+            return;
+        }
+
+        const state = { send: null };
+        const tick = () => {
+            if (!state.send) return pwTimers.delete(key);
+            state.send();
+            state.send = null;
+            setTimeout(tick, ms);
+        };
+
+        send();
+        pwTimers.set(key, state);
+        setTimeout(tick, ms);
+    };
+
+    window.pw = (element, name, args, timing) => {
+        const send = () => pwSend(element, name, args);
+        if (!timing) return send();
+
+        const key = element.dataset.pw + name;
+
+        if (timing.d) {
+            clearTimeout(pwTimers.get(key));
+            pwTimers.set(key, setTimeout(() => {
+                pwTimers.delete(key);
+                send();
+            }, timing.d));
+        } else {
+            pwThrottle(key, timing.t, send);
+        }
+    };
+
+    ws.addEventListener("message", msg => {
+        const [action, payload] = JSON.parse(msg.data);
+
+        if (action === UPDATE) {
+            document.body.innerHTML = payload;
+        } else if (action === PATCH) {
+            payload.forEach(pwPatch);
+        }
+    });
+"""
+
+CONSTANTS = (
+    "PROTOCOL_VERSION", "TRIGGER", "UPDATE", "PATCH",
+    "TEXT", "ATTR", "INSERT", "REPLACE", "REMOVE", "MOVE"
+)
+
+def minify(source: str) -> str:
+    # Only indentation and blank lines are dropped, every statement in
+    # the runtime is terminated explicitly so this is always safe.
+    return "\n".join(line.strip() for line in source.splitlines() if line.strip())
+
+def client_script() -> str:
+    constants = ",".join(f"{name}={getattr(protocol, name)}" for name in CONSTANTS)
+    return f"{{const {constants};\n{minify(CLIENT_SOURCE)}\n}}"
@@ -1,75 +1,945 @@
-from .html import WebElement, WebElementChild
-from typing import Callable
-from .signals import Signal
+from .html import WebElement, WebElementChild, EMPTY_ATTRIBUTES
+from typing import Callable, TypeAlias, Literal, Iterator, Any
+from .signals import Signal, Computed
 from .styles import Style
 from .refs import Ref
+from .protocol import TEXT, ATTR, INSERT, REPLACE, REMOVE, MOVE
+from .profiler import Tracer
+from . import tracking
+from html import escape
+from types import MappingProxyType
+import sys
+
+RAW_TEXT_ELEMENTS = { "script", "style" }
+
+# Patches address children by their index, so the page may only contain
+# what the browser's html parser keeps where it was put. A paragraph is
+# closed by any of these, and table parts only hold the listed children.
+BLOCK_ELEMENTS = {
+    "address", "article", "aside", "blockquote", "details", "dialog", "div", "dl",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4",
+    "h5", "h6", "header", "hgroup", "hr", "main", "menu", "nav", "ol", "p", "pre",
+    "section", "table", "ul"
+}
+TABLE_CONTENT = {
+    "table": { "caption", "colgroup", "thead", "tbody", "tfoot", "script", "template" },
+    "thead": { "tr", "script", "template" },
+    "tbody": { "tr", "script", "template" },
+    "tfoot": { "tr", "script", "template" },
+    "tr": { "td", "th", "script", "template" },
+    "colgroup": { "col", "template" },
+}
+STATE_EVENTS = { "oninput", "onchecked", "onscroll" }
+EMPTY_HANDLERS: dict[str, Callable[..., None]] = MappingProxyType({}) # type: ignore
+
+Patch: TypeAlias = "list[Any]"
+RenderedNode: TypeAlias = "TextNode | ElementNode | StaticNode | DynamicNode"
+
+class TextNode:
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+class ElementNode:
+    __slots__ = ("tag", "attributes", "handlers", "children", "key", "element", "id")
+
+    def __init__(
+        self,
+        tag: str,
+        attributes: dict[str, str | bool],
+        handlers: dict[str, Callable[..., None]],
+        children: list[RenderedNode],
+        key: str | None = None,
+        element: WebElement | None = None
+    ) -> None:
+        self.tag = tag
+        self.attributes = attributes
+        self.handlers = handlers
+        self.children = children
+        self.key = key
+        self.element = element
+        self.id = 0
+
+class StaticNode:
+    __slots__ = ("tag", "html", "key", "element")
+
+    def __init__(self, tag: str, html: str, key: str | None = None, element: WebElement | None = None) -> None:
+        self.tag = tag
+        self.html = html
+        self.key = key
+        self.element = element
+
+class DynamicNode:
+    __slots__ = ("renderer", "source", "parent", "depth", "children", "signals", "versions", "volatile", "disposed", "spliceable")
+
+    def __init__(
+        self,
+        renderer: "WebRenderer",
+        source: WebElementChild,
+        parent: ElementNode | None,
+        depth: int
+    ) -> None:
+        self.renderer = renderer
+        self.source = source
+        self.parent = parent
+        self.depth = depth
+        self.children: list[RenderedNode] = []
+        self.signals: list[Signal[Any] | Computed[Any]] = []
+        self.versions: dict[Computed[Any], int] | None = None
+        self.volatile = False
+        self.disposed = False
+        # Set when every child came from its own element in a list whose
+        # changes the source reports, see WebRenderer.splice.
+        self.spliceable = False
+
+    def track(self, source: Any) -> None:
+        # Refs don't notify anyone when they change, so anything reading
+        # one has to be re-evaluated on every update.
+        if isinstance(source, Signal):
+            if source not in self.signals:
+                self.signals.append(source)
+                source.observers.add(self)
+        elif isinstance(source, Computed):
+            if source not in self.signals:
+                self.signals.append(source)
+                source.observers.add(self)
+
+                if self.versions is None:
+                    self.versions = {}
+                self.versions[source] = source.version
+
+            if source.volatile:
+                self.volatile = True
+        else:
+            self.volatile = True
+
+    def invalidate(self) -> None:
+        if not self.disposed:
+            self.renderer.dirty.add(self)
+
+    def check(self) -> None:
+        if not self.disposed:
+            self.renderer.checked.add(self)
+
+    def changed(self) -> bool:
+        # Only reached through computed values, which may well end up with
+        # the same value as before.
+        for source, version in (self.versions or {}).items():
+            source.refresh()
+
+            if source.version != version:
+                return True
+
+        return False
+
+    def unsubscribe(self) -> None:
+        for signal in self.signals:
+            signal.unobserve(self)
+
+        self.signals = []
+        self.versions = None
+        self.volatile = False
+
+def attributes_to_string(attributes: dict[str, str | bool]) -> str:
+    concat = ""
+
+    for attr, val in attributes.items():
+        concat += f" {attr}" if val is True else f' {attr}="{escape(val)}"' # type: ignore
+
+    return concat
+
+def split_attributes(element: WebElement) -> tuple[dict[str, str | bool], dict[str, Callable[..., None]]]:
+    attributes: dict[str, str | bool] = {}
+    handlers: dict[str, Callable[..., None]] = {}
+
+    for attr, val in element.attributes.items():
+        if attr == "class_name": attr = "class"
+
+        if attr == "key":
+            continue
+        elif isinstance(val, Style):
+            if val.class_name is None:
+                raise Exception("Don't global_style in class_name attributes.")
+
+            attributes[attr] = val.class_name
+        elif callable(val):
+            handlers[attr] = val
+        elif type(val) == str:
+            attributes[attr] = val
+        elif type(val) == bool:
+            if val: attributes[attr] = True
+        else:
+            raise Exception("Invalid attribute value.")
+
+    return attributes or EMPTY_ATTRIBUTES, handlers or EMPTY_HANDLERS # type: ignore
+
+def element_key(element: WebElement) -> str | None:
+    key = element.attributes.get("key")
+    return None if key is None else str(key)
+
+def compile_child(child: WebElementChild, raw: bool) -> str | None:
+    if child == None:
+        return ""
+
+    if type(child) == int:
+        return str(child)
+
+    if isinstance(child, str):
+        return child if raw else escape(child, quote=False)
+
+    if isinstance(child, tuple):
+        concat = ""
+
+        for item in child:
+            if (compiled := compile_child(item, raw)) is None:
+                return None
+            concat += compiled
+
+        return concat
+
+    if isinstance(child, WebElement):
+        return compile_element(child) or None
+
+    return None
+
+def check_nesting(parent: str, child: WebElementChild) -> None:
+    if isinstance(child, str):
+        if parent in TABLE_CONTENT and child.strip():
+            raise Exception(f"Text can't be placed directly inside <{parent}>, browsers move it out of the table.")
+    elif isinstance(child, WebElement):
+        if parent == "p" and child.type in BLOCK_ELEMENTS:
+            raise Exception(f"<{child.type}> can't be placed inside <p>, browsers move it out of the paragraph.")
+        if parent in TABLE_CONTENT and child.type not in TABLE_CONTENT[parent]:
+            raise Exception(f"<{child.type}> can't be placed directly inside <{parent}>.")
+    elif isinstance(child, tuple):
+        for item in child:
+            check_nesting(parent, item)
+
+def compile_element(element: WebElement) -> str | Literal[False]:
+    # Elements without anything reactive in them render the same every
+    # time, so their html is built once and kept on the element.
+    if element.compiled is not None:
+        return element.compiled
+
+    element.compiled = False
+
+    for child in element.children:
+        check_nesting(element.type, child)
+
+    attributes, handlers = split_attributes(element)
+
+    if handlers:
+        return False
+
+    raw = element.type in RAW_TEXT_ELEMENTS
+    concat = f"<{element.type}{attributes_to_string(attributes)}>"
+
+    for child in element.children:
+        if (compiled := compile_child(child, raw)) is None:
+            return False
+        concat += compiled
+
+    element.compiled = concat + f"</{element.type}>"
+    return element.compiled
+
+def event_timing(handler: Callable[..., None] | None) -> str:
+    if (seconds := getattr(handler, "pyweb_debounce", None)) is not None:
+        return f"{{d:{round(seconds * 1000)}}}"
+    if (seconds := getattr(handler, "pyweb_throttle", None)) is not None:
+        return f"{{t:{round(seconds * 1000)}}}"
+
+    return ""
+
+def event_attribute(attr: str, handler: Callable[..., None] | None = None) -> tuple[str, str]:
+    name, args = attr, "0"
+
+    if attr == "oninput":
+        args = "[this.value]"
+    elif attr == "onchecked":
+        name, args = "onchange", "[this.checked]"
+    elif attr == "onscroll":
+        args = "[this.scrollTop,this.clientHeight]"
+
+    if timing := event_timing(handler):
+        return name, f"pw(this,'{attr}',{args},{timing})"
+    if args == "0":
+        return name, f"pw(this,'{attr}')"
+
+    return name, f"pw(this,'{attr}',{args})"
+
+def is_latest_wins(attr: str, handler: Callable[..., None]) -> bool:
+    # Only the newest value of these events matters, older ones still
+    # waiting to be handled can be skipped.
+    return attr in STATE_EVENTS or event_timing(handler) != ""
 
 class WebRenderer:
     def __init__(self, element: WebElementChild) -> None:
         self.root = element
-        self.actions: dict[str, Callable[..., None]] = {}
+        self.tree: list[RenderedNode] = []
+        self.nodes: dict[int, ElementNode] = {}
+        self.dirty: set[DynamicNode] = set()
+        self.checked: set[DynamicNode] = set()
+        self.volatile: set[DynamicNode] = set()
+        self.last_id = 0
+        self.tracer: Tracer | None = None
+        # Pages that are never updated, like cached ones, don't need ids.
+        self.ids = True
 
-    def render_element_to_string(self, element: WebElementChild) -> str:
+    def build(
+        self,
+        element: WebElementChild,
+        out: list[RenderedNode],
+        parent: ElementNode | None,
+        depth: int,
+        reusable: dict[int, RenderedNode] | None = None
+    ) -> None:
         if element == None:
-            return ""
-
-        if isinstance(element, Signal) or isinstance(element, Ref):
-            return self.render_element_to_string(element.get())
-        
-        if callable(element):
-            return self.render_element_to_string(element())
-        
+            return
+
+        if isinstance(element, Signal) or isinstance(element, Ref) or isinstance(element, Computed) or callable(element):
+            if reusable and isinstance(node := reusable.get(id(element)), DynamicNode) and node.source is element:
+                del reusable[id(element)]
+                out.append(node)
+                return
+
+            node = DynamicNode(self, element, parent, depth)
+            self.evaluate(node)
+            out.append(node)
+            return
+
         if type(element) == int:
-            return str(element)
-        
+            element = str(element)
+
         if type(element) == str:
-            return element
-        
+            if element == "":
+                return
+
+            if parent is not None:
+                check_nesting(parent.tag, element)
+
+            if out and isinstance(out[-1], TextNode):
+                out[-1] = TextNode(out[-1].text + element)
+            else:
+                out.append(TextNode(element))
+            return
+
         if type(element) == tuple:
-            return "".join(self.render_element_to_string(child) for child in element)
-        
+            for child in element:
+                self.build(child, out, parent, depth, reusable)
+            return
+
         if type(element) == WebElement:
-            concat = f"<{element.type}"
-            for attr, val in element.attributes.items():
-                if attr == "class_name": attr = "class"
-
-                if isinstance(val, Style):
-                    concat += f" {attr}={val.class_name}"
-                    
-                    if val.class_name is None:
-                        raise Exception("Don't global_style in class_name attributes.")
-                elif callable(val):
-                    attribute_id = str(id(element)) + "@" + attr
-
-                    if not self.actions.get(attribute_id):
-                        self.actions[attribute_id] = val
-
-                    if attr == "oninput":
-                        concat += f' {attr}="ws.send(\'trigger${attribute_id}$\'+JSON.stringify([ event.target.value ]))"'
-                    elif attr == "onchecked":
-                        concat += f' onchange="ws.send(\'trigger${attribute_id}$\'+JSON.stringify([ event.target.checked ]))"'
-                    else:
-                        concat += f' {attr}="ws.send(\'trigger${attribute_id}\')"'
-                elif type(val) == str:
-                    concat += f" {attr}={val}"
-                elif type(val) == bool:
-                    concat += f" {attr}" if val else ""
+            if parent is not None:
+                check_nesting(parent.tag, element)
+
+            if reusable and (node := reusable.get(id(element))) and getattr(node, "element", None) is element:
+                del reusable[id(element)]
+                out.append(node)
+            elif compiled := compile_element(element):
+                out.append(StaticNode(element.type, compiled, element_key(element), element))
+            else:
+                out.append(self.build_element(element, depth))
+            return
+
+        raise Exception("Found invalid child when rendering.")
+
+    def build_element(self, element: WebElement, depth: int) -> ElementNode:
+        attributes, handlers = split_attributes(element)
+        node = ElementNode(element.type, attributes, handlers, [], element_key(element), element)
+
+        for child in element.children:
+            self.build(child, node.children, node, depth)
+
+        return node
+
+    def evaluate(self, node: DynamicNode, reusable: dict[int, RenderedNode] | None = None) -> None:
+        if self.tracer is not None:
+            self.tracer.enter(node)
+
+        self.build_children(node, self.observe(node), reusable)
+
+        if self.tracer is not None:
+            self.tracer.exit(node)
+
+    def observe(self, node: DynamicNode) -> WebElementChild:
+        source = node.source
+
+        if isinstance(source, Signal) or isinstance(source, Ref) or isinstance(source, Computed):
+            value = tracking.observe(node, source.get)
+        else:
+            value = tracking.observe(node, source) # type: ignore
+
+        if node.volatile:
+            self.volatile.add(node)
+
+        return value
+
+    def build_children(self, node: DynamicNode, value: WebElementChild, reusable: dict[int, RenderedNode] | None = None) -> None:
+        node.children = []
+        self.build(value, node.children, node.parent, node.depth + 1, reusable)
+        node.spliceable = hasattr(node.source, "pyweb_splices") and isinstance(value, tuple) and all(
+            type(item) == WebElement for item in value
+        )
+
+    def flatten(self, children: list[RenderedNode], out: list[RenderedNode] | None = None) -> list[RenderedNode]:
+        if out is None:
+            out = []
+
+        # Adjacent strings end up as a single text node in the browser,
+        # so they are merged here to keep child indices in sync.
+        for child in children:
+            if isinstance(child, DynamicNode):
+                self.flatten(child.children, out)
+            elif isinstance(child, TextNode) and out and isinstance(out[-1], TextNode):
+                out[-1] = TextNode(out[-1].text + child.text)
+            else:
+                out.append(child)
+
+        return out
+
+    def leaves(self, children: list[RenderedNode], stop: DynamicNode) -> Iterator[RenderedNode]:
+        for child in children:
+            if isinstance(child, DynamicNode) and child is not stop:
+                yield from self.leaves(child.children, stop)
+            else:
+                yield child
+
+    def locate(self, node: DynamicNode) -> tuple[int, "RenderedNode | None", "RenderedNode | None"]:
+        # Index of the node's first child among its flattened siblings,
+        # along with the siblings right before and after its children.
+        siblings = node.parent.children if node.parent else self.tree
+        offset = 0
+        before: "RenderedNode | None" = None
+        found = False
+
+        for leaf in self.leaves(siblings, node):
+            if leaf is node:
+                found = True
+            elif found:
+                return offset, before, leaf
+            else:
+                if not isinstance(leaf, TextNode) or not isinstance(before, TextNode):
+                    offset += 1
+                before = leaf
+
+        return offset, before, None
+
+    def node_to_string(self, node: RenderedNode, raw: bool = False) -> str:
+        if isinstance(node, TextNode):
+            return node.text if raw else escape(node.text, quote=False)
+
+        if isinstance(node, StaticNode):
+            return node.html
+
+        if isinstance(node, DynamicNode):
+            return "".join(self.node_to_string(child, raw) for child in node.children)
+
+        concat = self.open_tag(node)
+
+        raw_children = node.tag in RAW_TEXT_ELEMENTS
+        for child in node.children:
+            concat += self.node_to_string(child, raw_children)
+        concat += f"</{node.tag}>"
+
+        return concat
+
+    def open_tag(self, node: ElementNode) -> str:
+        concat = f'<{node.tag} data-pw="{node.id}"' if self.ids else f"<{node.tag}"
+        concat += attributes_to_string(node.attributes)
+
+        for attr, handler in node.handlers.items():
+            name, value = event_attribute(attr, handler)
+            concat += f' {name}="{escape(value)}"'
+
+        return concat + ">"
+
+    def handler_paths(self) -> dict[tuple[int, ...], int]:
+        # Where each element with event listeners sits in the tree, which
+        # is the same for a page rendered again from the same state.
+        paths: dict[tuple[int, ...], int] = {}
+        stack: list[tuple[tuple[int, ...], RenderedNode]] = [((i,), node) for i, node in enumerate(self.tree)]
+
+        while stack:
+            path, node = stack.pop()
+
+            if isinstance(node, TextNode) or isinstance(node, StaticNode):
+                continue
+
+            if isinstance(node, ElementNode) and node.handlers:
+                paths[path] = node.id
+
+            stack.extend((path + (i,), child) for i, child in enumerate(node.children))
+
+        return paths
+
+    def get_action(self, node_id: int, attr: str) -> Callable[..., None] | None:
+        if not (node := self.nodes.get(node_id)):
+            return None
+
+        return node.handlers.get(attr)
+
+    def is_latest_wins(self, node_id: int, attr: str) -> bool:
+        return (action := self.get_action(node_id, attr)) is not None and is_latest_wins(attr, action)
+
+    def mount(self, node: RenderedNode) -> None:
+        if isinstance(node, TextNode) or isinstance(node, StaticNode):
+            return
+
+        if isinstance(node, ElementNode):
+            self.assign_id(node)
+
+        for child in node.children:
+            self.mount(child)
+
+    def assign_id(self, node: ElementNode) -> None:
+        self.last_id += 1
+        node.id = self.last_id
+        self.nodes[node.id] = node
+
+    def dispose(self, node: RenderedNode) -> None:
+        if isinstance(node, TextNode) or isinstance(node, StaticNode):
+            return
+
+        if isinstance(node, DynamicNode):
+            node.disposed = True
+            node.unsubscribe()
+            self.volatile.discard(node)
+        elif self.nodes.get(node.id) is node:
+            del self.nodes[node.id]
+
+        for child in node.children:
+            self.dispose(child)
+
+    def patch_attributes(self, old: ElementNode, new: ElementNode, patches: list[Patch]) -> None:
+        for attr, val in new.attributes.items():
+            if old.attributes.get(attr) != val:
+                patches.append([ATTR, new.id, attr, val])
+
+        for attr in old.attributes:
+            if attr not in new.attributes:
+                patches.append([ATTR, new.id, attr, None])
+
+        for attr, handler in new.handlers.items():
+            if attr not in old.handlers or event_timing(old.handlers[attr]) != event_timing(handler):
+                patches.append([ATTR, new.id, *event_attribute(attr, handler)])
+
+        for attr in old.handlers:
+            if attr not in new.handlers:
+                patches.append([ATTR, new.id, event_attribute(attr)[0], None])
+
+    def patch_node(self, parent: ElementNode | None, index: int, old: RenderedNode, new: RenderedNode, patches: list[Patch]) -> None:
+        parent_id = parent.id if parent else 0
+
+        if old is new:
+            return
+
+        if isinstance(old, TextNode) and isinstance(new, TextNode):
+            if old.text != new.text:
+                patches.append([TEXT, parent_id, index, new.text])
+            return
+
+        if isinstance(old, StaticNode) and isinstance(new, StaticNode):
+            if old.html != new.html:
+                patches.append([REPLACE, parent_id, index, new.html])
+            return
+
+        if isinstance(old, ElementNode) and isinstance(new, ElementNode):
+            new.id = old.id
+            self.nodes[new.id] = new
+            self.patch_attributes(old, new, patches)
+            self.diff_children(new, self.flatten(old.children), self.flatten(new.children), patches)
+
+    def adopt(self, old: RenderedNode, new: RenderedNode) -> None:
+        # For nodes same_node already compared, only the ids are carried
+        # over so the new handlers replace the old ones.
+        if old is new or not isinstance(old, ElementNode) or not isinstance(new, ElementNode):
+            return
+
+        new.id = old.id
+        self.nodes[new.id] = new
+
+        for old_child, new_child in zip(self.flatten(old.children), self.flatten(new.children)):
+            self.adopt(old_child, new_child)
+
+    def can_patch(self, old: RenderedNode, new: RenderedNode) -> bool:
+        if old is new:
+            return True
+
+        if isinstance(old, TextNode):
+            return isinstance(new, TextNode)
+
+        if isinstance(old, StaticNode):
+            return isinstance(new, StaticNode) and old.key == new.key
+
+        return isinstance(old, ElementNode) and isinstance(new, ElementNode) and \
+            old.tag == new.tag and old.key == new.key
+
+    def same_node(self, old: RenderedNode, new: RenderedNode) -> bool:
+        if old is new:
+            return True
+
+        if isinstance(old, TextNode) and isinstance(new, TextNode):
+            return old.text == new.text
+
+        if isinstance(old, StaticNode) and isinstance(new, StaticNode):
+            return old.html == new.html and old.key == new.key
+
+        if not isinstance(old, ElementNode) or not isinstance(new, ElementNode):
+            return False
+
+        if old.tag != new.tag or old.key != new.key or old.attributes != new.attributes:
+            return False
+
+        if old.handlers.keys() != new.handlers.keys():
+            return False
+
+        if any(event_timing(old.handlers[attr]) != event_timing(handler) for attr, handler in new.handlers.items()):
+            return False
+
+        old_children = self.flatten(old.children)
+        new_children = self.flatten(new.children)
+
+        return len(old_children) == len(new_children) and \
+            all(self.same_node(a, b) for a, b in zip(old_children, new_children))
+
+    def can_pair(self, old: RenderedNode, new: RenderedNode, pairs: dict[int, RenderedNode], paired: set[int]) -> bool:
+        if old is new:
+            return True
+
+        if id(new) in pairs or id(old) in paired:
+            return False
+
+        # Keyed nodes are left to the pairing by key.
+        if isinstance(new, ElementNode | StaticNode) and new.key is not None:
+            return False
+
+        return self.same_node(old, new)
+
+    def diff_children(
+        self,
+        parent: ElementNode | None,
+        old: list[RenderedNode],
+        new: list[RenderedNode],
+        patches: list[Patch],
+        offset: int = 0
+    ) -> None:
+        parent_id = parent.id if parent else 0
+        raw = parent is not None and parent.tag in RAW_TEXT_ELEMENTS
+
+        # Nodes that survived the update untouched and keyed children are
+        # matched regardless of their position, the rest are compared with
+        # whatever ends up at the same index.
+        old_ids = set(id(node) for node in old)
+        pairs: dict[int, RenderedNode] = {
+            id(node): node for node in new if id(node) in old_ids
+        }
+
+        by_key = {
+            node.key: node for node in old
+            if isinstance(node, ElementNode | StaticNode) and node.key is not None and id(node) not in pairs
+        }
+
+        for node in new:
+            if isinstance(node, ElementNode | StaticNode) and node.key is not None and id(node) not in pairs:
+                match = by_key.pop(node.key, None) # type: ignore
+
+                if match is not None and self.can_patch(match, node):
+                    pairs[id(node)] = match
+
+        # When children were only added or removed in the middle, pairing
+        # up the common head and tail keeps them from being patched position
+        # by position. Those were already compared as a whole, so they only
+        # take over the old ids.
+        same: set[int] = set()
+
+        if len(old) != len(new):
+            shortest = min(len(old), len(new))
+            paired = set(id(node) for node in pairs.values())
+            prefix = 0
+
+            while prefix < shortest and self.can_pair(old[prefix], new[prefix], pairs, paired):
+                pairs[id(new[prefix])] = old[prefix]
+                same.add(id(new[prefix]))
+                prefix += 1
+
+            for i in range(1, shortest - prefix + 1):
+                old_node, new_node = old[-i], new[-i]
+
+                if old_node is new_node:
+                    continue
+
+                if not self.can_pair(old_node, new_node, pairs, paired):
+                    break
+
+                pairs[id(new_node)] = old_node
+                same.add(id(new_node))
+
+        kept = set(id(node) for node in pairs.values())
+        current = list(old)
+
+        for i, node in enumerate(new):
+            match = pairs.get(id(node))
+
+            if match is not None:
+                while current[i] is not match and id(current[i]) not in kept:
+                    current.pop(i)
+                    patches.append([REMOVE, parent_id, offset + i])
+
+                if current[i] is not match:
+                    j = current.index(match, i)
+                    current.insert(i, current.pop(j))
+                    patches.append([MOVE, parent_id, offset + j, offset + i])
+
+                if id(node) in same:
+                    self.adopt(match, node)
                 else:
-                    raise Exception("Invalid attribute value.")
-                
-            concat += ">"
+                    self.patch_node(parent, offset + i, match, node, patches)
+
+                current[i] = node
+                continue
+
+            existing = current[i] if i < len(current) else None
+
+            if existing is None or id(existing) in kept:
+                self.mount(node)
+                current.insert(i, node)
+                patches.append([INSERT, parent_id, offset + i, self.node_to_string(node, raw)])
+            elif self.can_patch(existing, node):
+                self.patch_node(parent, offset + i, existing, node, patches)
+                current[i] = node
+            else:
+                self.mount(node)
+                current[i] = node
+                patches.append([REPLACE, parent_id, offset + i, self.node_to_string(node, raw)])
+
+        for i in reversed(range(len(new), len(current))):
+            patches.append([REMOVE, parent_id, offset + i])
+
+    def splice(self, node: DynamicNode, splices: list[tuple[int, int, list[WebElementChild]]], patches: list[Patch]) -> bool:
+        # Each spliced element is exactly one child, so the changes can be
+        # sent as they are instead of diffing the whole list. Text on either
+        # side of an empty list merges, which only a full diff handles.
+        length = len(node.children)
+
+        for _, removed, inserted in splices:
+            if any(type(item) != WebElement for item in inserted):
+                return False
+
+            length += len(inserted) - removed
+
+        if not node.children or not length:
+            return False
+
+        offset = self.locate(node)[0]
+        parent_id = node.parent.id if node.parent else 0
+        raw = node.parent is not None and node.parent.tag in RAW_TEXT_ELEMENTS
+        removed_nodes: dict[int, RenderedNode] = {}
+
+        for index, removed, inserted in splices:
+            for child in node.children[index:index + removed]:
+                removed_nodes[id(child.element)] = child # type: ignore
+
+            for i in reversed(range(index, index + removed)):
+                patches.append([REMOVE, parent_id, offset + i])
+
+            nodes: list[RenderedNode] = []
+
+            # Items moved by a keyed list come back as the same element and
+            # keep their node.
+            for i, item in enumerate(inserted):
+                if (child := removed_nodes.pop(id(item), None)) is None:
+                    out: list[RenderedNode] = []
+                    self.build(item, out, node.parent, node.depth + 1)
+                    child = out[0]
+                    self.mount(child)
+
+                nodes.append(child)
+                patches.append([INSERT, parent_id, offset + index + i, self.node_to_string(child, raw)])
+
+            node.children[index:index + removed] = nodes
+
+        for child in removed_nodes.values():
+            self.dispose(child)
+
+        return True
+
+    def merges_text(self, neighbour: "RenderedNode | None", old: list[RenderedNode], new: list[RenderedNode], end: int) -> bool:
+        if not isinstance(neighbour, TextNode):
+            return False
+
+        return not old or not new or isinstance(old[end], TextNode) or isinstance(new[end], TextNode)
+
+    def refresh(self, node: DynamicNode, patches: list[Patch]) -> None:
+        stale = node.signals
+        node.signals, node.versions, node.volatile = [], None, False
+        self.volatile.discard(node)
+
+        if self.tracer is not None:
+            self.tracer.enter(node)
+
+        value = self.observe(node)
+        splices = getattr(node.source, "pyweb_splices", None)
+
+        if node.spliceable and splices is not None and self.splice(node, splices, patches):
+            if self.tracer is not None:
+                self.tracer.exit(node)
+        else:
+            old_children = node.children
+
+            # Elements and callables that come back unchanged, like the items
+            # `each` keeps between updates or the branch `whether` shows, keep
+            # their rendered nodes and whatever reactive state is inside them.
+            reusable: dict[int, RenderedNode] = {}
+
+            for child in old_children:
+                if isinstance(child, DynamicNode):
+                    reusable[id(child.source)] = child
+                elif not isinstance(child, TextNode) and child.element is not None:
+                    reusable[id(child.element)] = child
+
+            self.build_children(node, value, reusable)
+
+            if self.tracer is not None:
+                self.tracer.exit(node)
+
+            offset, before, after = self.locate(node)
+            old, new = self.flatten(old_children), self.flatten(node.children)
+
+            # Only the node's own children are compared, unless text at either
+            # end merges with a neighbouring text node in the browser.
+            if self.merges_text(before, old, new, 0) or self.merges_text(after, old, new, -1):
+                siblings = node.parent.children if node.parent else self.tree
+                new_children, node.children = node.children, old_children
+                old = self.flatten(siblings)
+                node.children = new_children
+                self.diff_children(node.parent, old, self.flatten(siblings), patches)
+            else:
+                self.diff_children(node.parent, old, new, patches, offset)
+
+            kept = set(id(child) for child in node.children)
+            for child in old_children:
+                if id(child) not in kept:
+                    self.dispose(child)
+
+        # Same as for computed values, sources that are read again keep
+        # this node as an observer the whole time.
+        for source in stale:
+            if source not in node.signals:
+                source.unobserve(node)
+
+    def memory_usage(self) -> int:
+        size = 0
+        stack: list[RenderedNode] = list(self.tree)
+
+        while stack:
+            node = stack.pop()
+            size += sys.getsizeof(node)
+
+            if isinstance(node, TextNode):
+                size += sys.getsizeof(node.text)
+                continue
+
+            if isinstance(node, StaticNode):
+                size += sys.getsizeof(node.html)
+                continue
+
+            if isinstance(node, ElementNode):
+                if node.attributes is not EMPTY_ATTRIBUTES:
+                    size += sys.getsizeof(node.attributes)
+                    size += sum(sys.getsizeof(val) for val in node.attributes.values())
+
+                if node.handlers is not EMPTY_HANDLERS:
+                    size += sys.getsizeof(node.handlers)
+
+            size += sys.getsizeof(node.children)
+            stack.extend(node.children)
+
+        return size
+
+    def stream(self, element: WebElementChild, out: list[RenderedNode], parent: ElementNode | None, depth: int) -> Iterator[str]:
+        if isinstance(element, tuple):
+            for child in element:
+                yield from self.stream(child, out, parent, depth)
+            return
+
+        if isinstance(element, WebElement) and parent is not None:
+            check_nesting(parent.tag, element)
+
+        # Dynamic elements are opened before their children are built so
+        # their html can be sent while the rest of the page is rendering.
+        if isinstance(element, WebElement) and not compile_element(element):
+            attributes, handlers = split_attributes(element)
+            node = ElementNode(element.type, attributes, handlers, [], element_key(element), element)
+            self.assign_id(node)
+            out.append(node)
+
+            yield self.open_tag(node)
 
             for child in element.children:
-                concat += self.render_element_to_string(child)
-            concat += f"</{element.type}>"
+                yield from self.stream(child, node.children, node, depth)
 
-            return concat
-        
-        raise Exception("Found invalid child when rendering.")
+            yield f"</{node.tag}>"
+            return
+
+        raw = parent is not None and parent.tag in RAW_TEXT_ELEMENTS
+
+        if type(element) == str or type(element) == int:
+            self.build(element, out, parent, depth)
+            yield str(element) if raw else escape(str(element), quote=False)
+            return
+
+        start = len(out)
+        self.build(element, out, parent, depth)
+
+        for node in out[start:]:
+            self.mount(node)
+            yield self.node_to_string(node, raw)
+
+    def render_stream(self) -> Iterator[str]:
+        for node in self.tree:
+            self.dispose(node)
+
+        self.tree = []
+        self.dirty = set()
+        self.checked = set()
+        yield from self.stream(self.root, self.tree, None, 0)
+
+    def render(self) -> str:
+        return "".join(self.render_stream())
+
+    def is_static(self, nodes: list[RenderedNode] | None = None) -> bool:
+        for node in self.tree if nodes is None else nodes:
+            if isinstance(node, DynamicNode):
+                if node.signals or node.volatile or not self.is_static(node.children):
+                    return False
+            elif isinstance(node, ElementNode):
+                if node.handlers or not self.is_static(node.children):
+                    return False
+
+        return True
+
+    def snapshot(self) -> str:
+        return "".join(self.node_to_string(node) for node in self.tree)
+
+    def update(self) -> list[Patch]:
+        patches: list[Patch] = []
+
+        # Outer nodes go first, re-evaluating them disposes the nodes they
+        # contain, which then no longer need their own update.
+        for node in self.checked:
+            if not node.disposed and node not in self.dirty and node.changed():
+                self.dirty.add(node)
+
+        pending = sorted(self.dirty | self.volatile, key=lambda node: node.depth)
+        self.dirty = set()
+        self.checked = set()
+
+        for node in pending:
+            if not node.disposed:
+                self.refresh(node, patches)
 
-    def render(self):
-        self.actions = {}
-        return self.render_element_to_string(self.root)
+        return patches
 
 def create_renderer(element: WebElementChild):
-    return WebRenderer(element)
\ No newline at end of file
+    return WebRenderer(element)
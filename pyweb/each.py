@@ -1,31 +1,136 @@
-from typing import TypeVar, Callable
-from .signals import Signal
+from typing import TypeVar, Generic, Callable, Hashable, Any
+from .signals import Signal, Computed
+from .reactive import ReactiveList, ListChange
 from .refs import Ref
-from .html import WebElementChild
+from .html import WebElement, WebElementChild
 from inspect import signature
 
 T = TypeVar("T")
 
+CacheEntry = tuple[T, int, WebElementChild]
+
+# Like a list change, but with the number of removed outputs and the
+# outputs that took their place.
+Splice = tuple[int, int, list[WebElementChild]]
+
+class ItemMapper(Generic[T]):
+    def __init__(self, mapper: Callable[[T], WebElementChild] | Callable[[T, int], WebElementChild]) -> None:
+        self.mapper = mapper
+        self.is_single_param = len(signature(mapper).parameters) == 1
+
+    def __call__(self, item: T, index: int) -> WebElementChild:
+        if self.is_single_param:
+            return self.mapper(item) # type: ignore
+
+        return self.mapper(item, index) # type: ignore
+
+    def keyed(self, item: T, index: int, cached: CacheEntry[T] | None, item_key: Hashable) -> CacheEntry[T]:
+        if cached and cached[0] is item and (self.is_single_param or cached[1] == index):
+            return cached
+
+        output = self(item, index)
+
+        if isinstance(output, WebElement) and "key" not in output.attributes:
+            output.attributes = { **output.attributes, "key": str(item_key) }
+
+        return (item, index, output)
+
 def each(
-    items: Signal[list[T]] | Ref[list[T]],
-    mapper: Callable[[T], WebElementChild] | Callable[[T, int], WebElementChild]
+    items: Signal[list[T]] | Ref[list[T]] | Computed[list[T]],
+    mapper: Callable[[T], WebElementChild] | Callable[[T, int], WebElementChild],
+    key: Callable[[T], Hashable] | None = None
 ) -> Callable[[], WebElementChild]:
     last_items: list[T] | None = None
-    last_rendered: tuple[WebElementChild] | None = None
-    is_single_param = len(signature(mapper).parameters) == 1
+    last_rendered: tuple[WebElementChild, ...] | None = None
+    last_version: int | None = None
+    rendered: list[WebElementChild] = []
+    map_item = ItemMapper(mapper)
+    cache: dict[Hashable, CacheEntry[T]] = {}
+
+    def map_keyed(items: list[T]) -> list[WebElementChild]:
+        nonlocal cache
+
+        # Items are matched to the previous update by their key and only
+        # get mapped again if they are a different object or, for mappers
+        # that take the index, if they moved.
+        next_cache: dict[Hashable, CacheEntry[T]] = {}
+        outputs: list[WebElementChild] = []
+
+        for index, item in enumerate(items):
+            item_key = key(item) # type: ignore
+            entry = next_cache[item_key] = map_item.keyed(item, index, cache.get(item_key), item_key)
+            outputs.append(entry[2])
+
+        cache = next_cache
+        return outputs
+
+    def apply_changes(changes: list[ListChange]) -> list[Splice]:
+        # Only the spliced items are mapped, everything else keeps its
+        # output. Removed items are held on to until the end so an item
+        # that is moved keeps its output too.
+        removed_entries: dict[Hashable, CacheEntry[T]] = {}
+        splices: list[Splice] = []
+
+        for index, removed, inserted in changes:
+            outputs: list[WebElementChild] = []
+
+            if key is None:
+                outputs = [map_item(item, index) for item in inserted]
+            else:
+                for item in removed:
+                    if (entry := cache.pop(item_key := key(item), None)) is not None:
+                        removed_entries[item_key] = entry
+
+                for item in inserted:
+                    item_key = key(item)
+                    cached = cache.get(item_key) or removed_entries.pop(item_key, None)
+                    entry = cache[item_key] = map_item.keyed(item, index, cached, item_key)
+                    outputs.append(entry[2])
+
+            rendered[index:index + len(removed)] = outputs
+            splices.append((index, len(removed), outputs))
+
+        return splices
 
     def wrapper():
         nonlocal last_items
         nonlocal last_rendered
+        nonlocal last_version
+        nonlocal rendered
+
+        current = items.get()
+
+        # What changed since the last call is handed to the renderer too,
+        # None means everything has to be compared again.
+        wrapper.pyweb_splices = None # type: ignore
 
-        if last_items is not None and id(last_items) == id(items.get()):
+        # Reactive lists are changed in place, the changes they recorded
+        # since the last update say what to map again.
+        if isinstance(items, ReactiveList):
+            if last_version is not None and map_item.is_single_param:
+                if (changes := items.changes_since(last_version)) is not None:
+                    wrapper.pyweb_splices = [] # type: ignore
+
+                    if changes:
+                        wrapper.pyweb_splices = apply_changes(changes) # type: ignore
+                        last_rendered = tuple(rendered)
+
+                    last_version = items.version
+                    return last_rendered
+
+            last_version = items.version
+        elif last_items is not None and id(last_items) == id(current):
+            wrapper.pyweb_splices = [] # type: ignore
             return last_rendered
-        
-        last_items = items.get()
-
-        if is_single_param:
-            return (last_rendered := tuple(mapper(item) for item in items.get())) # type: ignore
-        
-        return (last_rendered := tuple(mapper(item, i) for i, item in enumerate(items.get()))) # type: ignore
-    
+
+        last_items = current
+
+        if key is not None:
+            rendered = map_keyed(current)
+        else:
+            rendered = [map_item(item, i) for i, item in enumerate(current)]
+
+        return (last_rendered := tuple(rendered))
+
+    wrapper.pyweb_source = ("each", mapper) # type: ignore
     return wrapper
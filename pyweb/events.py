@@ -0,0 +1,16 @@
+from typing import Callable, TypeVar, Any
+from .tasks import mark
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+def debounce(seconds: float) -> Callable[[F], F]:
+    def wrapper(funct: F) -> F:
+        return mark(funct, pyweb_debounce=seconds)
+
+    return wrapper
+
+def throttle(seconds: float) -> Callable[[F], F]:
+    def wrapper(funct: F) -> F:
+        return mark(funct, pyweb_throttle=seconds)
+
+    return wrapper
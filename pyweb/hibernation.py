@@ -0,0 +1,78 @@
+from typing import Any
+import tempfile
+import shutil
+import atexit
+import pickle
+import os
+
+# Only the parts of the request a page handler can read are kept, the
+# rest of the ASGI scope belongs to the connection that is long gone.
+REQUEST_SCOPE_KEYS = (
+    "type", "asgi", "http_version", "method", "scheme", "path", "raw_path",
+    "query_string", "root_path", "headers", "client", "server"
+)
+
+def request_scope(scope: dict[str, Any]) -> dict[str, Any]:
+    return { key: scope[key] for key in REQUEST_SCOPE_KEYS if key in scope }
+
+async def empty_body() -> dict[str, Any]:
+    return { "type": "http.request", "body": b"", "more_body": False }
+
+class HibernationStore:
+    def __init__(self, directory: str | None = None) -> None:
+        self.directory = directory
+        self.temporary = directory is None
+        self.saved: set[str] = set()
+        self.hibernations = 0
+        self.restores = 0
+
+    def path(self, session_id: str) -> str:
+        # Created on first use, so every worker process gets its own.
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix="pyweb-sessions-")
+            atexit.register(self.close)
+
+        return os.path.join(self.directory, f"{session_id}.pickle")
+
+    def save(self, session_id: str, state: dict[str, Any]) -> None:
+        data = pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+
+        with open(self.path(session_id), "wb") as file:
+            file.write(data)
+
+        self.saved.add(session_id)
+        self.hibernations += 1
+
+    def load(self, session_id: str) -> dict[str, Any]:
+        path = self.path(session_id)
+
+        with open(path, "rb") as file:
+            state = pickle.load(file)
+
+        os.remove(path)
+        self.saved.discard(session_id)
+        self.restores += 1
+        return state
+
+    def remove(self, session_id: str) -> None:
+        self.saved.discard(session_id)
+
+        try:
+            os.remove(self.path(session_id))
+        except FileNotFoundError:
+            pass
+
+    def close(self) -> None:
+        # The sessions only exist in this process, so their files can't be
+        # used by anything once it stops.
+        if self.directory is None:
+            return
+
+        if self.temporary:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+        else:
+            for session_id in list(self.saved):
+                self.remove(session_id)
+
+        self.saved.clear()
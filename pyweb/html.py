@@ -1,11 +1,12 @@
-from typing import TypeAlias, Any, Callable, TYPE_CHECKING
+from typing import TypeAlias, Any, Callable, Literal, TYPE_CHECKING
 from .styles import Style
+from types import MappingProxyType
 
 if TYPE_CHECKING:
-    from .signals import Signal
+    from .signals import Signal, Computed
     from .refs import Ref
 
-WebElementChild: TypeAlias = "WebElement | str | int | tuple[WebElementChild, ...] | Signal[Any] | Ref[Any] | Callable[[], WebElementChild] | None"
+WebElementChild: TypeAlias = "WebElement | str | int | tuple[WebElementChild, ...] | Signal[Any] | Ref[Any] | Computed[Any] | Callable[[], WebElementChild] | None"
 WebElementAttributeValue: TypeAlias = "str | bool | Style | Callable[..., None]"
 WebElementAttributes: TypeAlias = "dict[str, WebElementAttributeValue]"
 
@@ -40,11 +41,45 @@ WebElementAttributes: TypeAlias = "dict[str, WebElementAttributeValue]"
     
 #     return True
 
+TABLE_SECTIONS = { "caption", "colgroup", "thead", "tbody", "tfoot", "script", "template" }
+
+def table_body(children: tuple[WebElementChild, ...]) -> tuple[WebElementChild, ...]:
+    # Browsers put rows that sit directly in a table into a tbody, rows
+    # and anything that can turn into rows are wrapped in one up front so
+    # the page matches what the browser ends up with.
+    out: list[WebElementChild] = []
+    rows: list[WebElementChild] = []
+
+    for child in children:
+        if child is None or type(child) == str or (isinstance(child, WebElement) and child.type in TABLE_SECTIONS):
+            if rows:
+                out.append(WebElement("tbody", tuple(rows), {}))
+                rows = []
+
+            out.append(child)
+        else:
+            rows.append(child)
+
+    if rows:
+        out.append(WebElement("tbody", tuple(rows), {}))
+
+    return tuple(out)
+
+# Most elements have no attributes, so they all share this one instead
+# of each holding on to an empty dict of their own. It is read-only, an
+# element that needs attributes later gets a dict of its own.
+EMPTY_ATTRIBUTES: WebElementAttributes = MappingProxyType({}) # type: ignore
+
 class WebElement:
+    __slots__ = ("type", "children", "attributes", "compiled")
+
     def __init__(self, typeof: str, children: tuple[WebElementChild, ...], attributes: WebElementAttributes) -> None:
         self.type = typeof
         self.children = children
-        self.attributes = attributes
+        self.attributes = attributes or EMPTY_ATTRIBUTES
+        # Serialized html of the element if nothing inside it can change,
+        # False if it can and None if that hasn't been checked yet.
+        self.compiled: str | Literal[False] | None = None
 
     #
     # Replaced by dumber diffing method.
@@ -163,7 +198,7 @@ def ins(*children: WebElementChild, **attributes: WebElementAttributeValue): ret
 def caption(*children: WebElementChild, **attributes: WebElementAttributeValue): return WebElement("caption", children, attributes)
 def col(*children: WebElementChild, **attributes: WebElementAttributeValue): return WebElement("col", children, attributes)
 def colgroup(*children: WebElementChild, **attributes: WebElementAttributeValue): return WebElement("colgroup", children, attributes)
-def table(*children: WebElementChild, **attributes: WebElementAttributeValue): return WebElement("table", children, attributes)
+def table(*children: WebElementChild, **attributes: WebElementAttributeValue): return WebElement("table", table_body(children), attributes)
 def tbody(*children: WebElementChild, **attributes: WebElementAttributeValue): return WebElement("tbody", children, attributes)
 def tr(*children: WebElementChild, **attributes: WebElementAttributeValue): return WebElement("tr", children, attributes)
 def td(*children: WebElementChild, **attributes: WebElementAttributeValue): return WebElement("td", children, attributes)
@@ -1,172 +1,530 @@
-from typing import Callable, TypeAlias, TYPE_CHECKING, Protocol, Any
+from typing import Callable, TypeAlias, Protocol, Any
 from .html import WebElementChild
-from .dom import create_renderer
-from .styles import Style
-from . import page_info
+from .dom import create_renderer, compile_child
+from .styles import Style, compile_styles, content_hash
+from .cache import PageCache, CachedPage
+from .assets import StaticAsset
+from .outbox import Outbox
+from .inbox import Inbox
+from .client import client_script
+from .signals import Signal, batch
+from .refs import Ref
+from . import tasks
+from concurrent.futures import ThreadPoolExecutor
+from .sessions import Session, SessionStore
+from .hibernation import HibernationStore, request_scope, empty_body
+from .workers import run_workers
+from .metrics import Metrics
+from .profiler import Tracer
+from . import page_info, protocol
 import uvicorn
 import falcon # type: ignore
 from falcon.asgi import App # type: ignore
 from falcon.asgi.ws import WebSocket # type: ignore
 import string
 import random
-import json
+import asyncio
+import contextvars
+import threading
+import time
 
 Request: TypeAlias = "falcon.Request"
 
+STREAM_CHUNK_SIZE = 16 * 1024
+DEFAULT_CACHE_SIZE = 128
+
 class RouteHandler(Protocol):
     def __call__(self, request: Request, *params: Any) -> WebElementChild:
         ...
 
-if TYPE_CHECKING:
-    from .dom import WebRenderer
-
 def get_random_id() -> str:
     return "".join(
         random.choices(string.ascii_letters + string.digits, k=6)
     )
 
-def get_websocket_script(id: str) -> str:
-    return  'window.ws = new WebSocket(window.location.protocol.replace("http", "ws") + "//" + window.location.host + window.location.pathname + "?id=' + id + '");' \
-            'ws.addEventListener("message", msg => {' \
-            'const index = msg.data.indexOf("$");' \
-            'const action = msg.data.substring(0, index);' \
-            'const message = msg.data.substring(index + 1);' \
-            'if (action === "update") {' \
-            'document.body.innerHTML = message;' \
-            '}' \
-            '});'
-            # 'function listenerTrigger(id, event) {' \
-            # 'ws.send(`trigger\\$${id}$`)' \
-            # '}'
-
 class AppCurrentPage:
     def __init__(self) -> None:
         self.update_callback: Callable[[], None] | None = None
         self.actions: dict[str, Callable[[], None]] = {}
+        self.update_scheduled = False
+        # Signals and refs are only collected while a page that can
+        # hibernate runs its handler.
+        self.signals: "list[Signal[Any] | Ref[Any]] | None" = None
+        self.last_active = time.monotonic()
+
+        try:
+            self.loop: asyncio.AbstractEventLoop | None = asyncio.get_running_loop()
+        except RuntimeError:
+            self.loop = None
+
+        self.thread = threading.get_ident()
     
     def on_update(self, funct: Callable[[], None]) -> None:
         self.update_callback = funct
 
+    def dispatch(self, funct: Callable[[], None]) -> None:
+        # Signals written from a worker thread notify the page from its
+        # own event loop, the renderer is never touched by two threads.
+        if self.loop is None or threading.get_ident() == self.thread:
+            return funct()
+
+        self.loop.call_soon_threadsafe(funct, context=contextvars.Context())
+
+    def invalidate(self):
+        self.last_active = time.monotonic()
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self.rerender()
+
+        # Writes made during the same loop iteration are coalesced
+        # into a single render on the next tick.
+        if not self.update_scheduled:
+            self.update_scheduled = True
+            loop.call_soon(self.rerender)
+
     def rerender(self):
+        self.update_scheduled = False
+        self.last_active = time.monotonic()
+
         if self.update_callback:
             self.update_callback()
 
 class WebRequestHandler:
-    def __init__(self, app: "WebApp", handler: tuple[RouteHandler, list[Style]]) -> None:
+    def __init__(self, app: "WebApp", handler: tuple[RouteHandler, list[Style], int], route: str = "") -> None:
         self.app = app
         self.handler = handler[0]
         self.styles = handler[1]
-        self.renderers: dict[str, tuple[AppCurrentPage, WebRenderer]] = {}
-        self.all_styles = ""
+        self.route = route
+        self.cache = PageCache(handler[2]) if handler[2] else None
 
-        for style in self.styles:
-            self.all_styles += style.style_text
-
-    async def on_websocket(self, req: falcon.Request, socket: WebSocket):
+    async def on_websocket(self, req: falcon.Request, socket: WebSocket, **kwargs: Any):
         client_id: str = req.params.get("id") # type: ignore
 
-        if not (pair := self.renderers.get(client_id)):
+        if req.params.get("v") != str(protocol.PROTOCOL_VERSION):
+            return
+
+        if not (session := self.app.sessions.get(client_id)) or session.hibernated:
             return
 
         await socket.accept()
 
-        page, renderer = pair
-        
-        last_rendered: str = renderer.render()
+        session.connections += 1
 
-        @page.on_update
-        def update_page(): # type: ignore
-            nonlocal last_rendered
+        metrics = self.app.metrics
+        outbox = Outbox(socket, session.renderer, self.app.max_pending_patches, metrics) # type: ignore
+        session.outbox = outbox
+        sender = asyncio.create_task(outbox.run())
 
+        @session.on_close
+        def close_session(): # type: ignore
             if not socket.closed:
-                new_content = renderer.render()
+                falcon.get_running_loop().create_task(socket.close())
 
-                if last_rendered != new_content:
-                    falcon.get_running_loop().create_task(
-                        socket.send_text("update$" + new_content)
-                    )
+        self.connect(session, outbox)
 
-                last_rendered = new_content
+        inbox = Inbox(socket, metrics)
+        receiver = asyncio.create_task(inbox.run(lambda: self.app.sessions.touch(session)))
 
-        while not socket.closed:
-            text = await socket.receive_text()
-            if socket.closed: break
+        def is_latest_wins(node_id: int, attr: str) -> bool:
+            node_id = session.moved_ids.get(node_id, node_id)
+            return session.renderer is not None and session.renderer.is_latest_wins(node_id, attr)
 
-            try:
-                index = text.index("$")
-                action = text[:index]
-                args = text[index + 1:].split("$")
+        try:
+            while True:
+                # A session that stays idle for long enough is put on disk
+                # and only built again once the client sends something.
+                try:
+                    message = await asyncio.wait_for(inbox.get(is_latest_wins), self.idle_timeout(session))
+                except asyncio.TimeoutError:
+                    if outbox.depth or outbox.snapshot:
+                        session.page.last_active = time.monotonic() # type: ignore
+                    elif self.idle_timeout(session) == 0:
+                        self.hibernate(session, outbox)
 
-                if action == "trigger" and len(args) >= 1:
-                    if not (callback := renderer.actions.get(args[0])):
-                        break
+                    continue
 
-                    func_args = []
-                    if len(args) > 1:
-                        func_args = json.loads(args[1])
-                    
-                    callback(*func_args)
-            except Exception as e:
-                print("!! EXCEPTION !!", e)
-                break
+                if message is None:
+                    break
+
+                try:
+                    if not await self.handle(session, outbox, message):
+                        break
+                except Exception as e:
+                    print("!! EXCEPTION !!", e)
+                    metrics.exception("callback", e)
+                    break
+        finally:
+            inbox.close()
+            receiver.cancel()
+            outbox.close()
+            await sender
+
+            session.connections -= 1
+
+            if session.page is not None:
+                session.page.update_callback = None
+
+            if session.connections == 0:
+                self.app.sessions.remove(session.id)
+
+                if session.hibernated:
+                    self.app.hibernation.remove(session.id)
         
         if not socket.closed:
             await socket.close()
 
-    async def on_get(self, req: falcon.Request, res: falcon.Response, **kwargs: Any):
+    async def handle(self, session: Session, outbox: Outbox, message: list[Any]) -> bool:
+        if session.hibernated:
+            await self.restore(session, outbox)
+
+        page, renderer = session.page, session.renderer
+
+        if message[0] == protocol.TRIGGER:
+            node_id = session.moved_ids.get(message[1], message[1])
+
+            if not (callback := renderer.get_action(node_id, message[2])): # type: ignore
+                return False
+
+            func_args = message[3] if len(message) > 3 else []
+            start = time.perf_counter()
+
+            with page_info.page_scope(page): # type: ignore
+                if tasks.is_async(callback):
+                    await self.app.run(callback, *func_args)
+                else:
+                    with batch():
+                        callback(*func_args)
+
+            self.app.metrics.callbacks.observe(
+                time.perf_counter() - start, self.route, getattr(callback, "__qualname__", message[2])
+            )
+
+        return True
+
+    def connect(self, session: Session, outbox: Outbox) -> None:
+        page, renderer = session.page, session.renderer
+        metrics = self.app.metrics
+
+        @page.on_update # type: ignore
+        def update_page(): # type: ignore
+            if not outbox.closed:
+                start = time.perf_counter()
+
+                with page_info.page_scope(page): # type: ignore
+                    patches = renderer.update() # type: ignore
+
+                metrics.renders.observe(time.perf_counter() - start, self.route, "update")
+
+                if not patches:
+                    metrics.updates_skipped.inc(self.route)
+
+                outbox.push(patches)
+
+    def idle_timeout(self, session: Session) -> float | None:
+        if self.app.hibernate_after is None or session.signals is None:
+            return None
+
+        # Updates the server sends on its own count as much as events from
+        # the client, a page that keeps changing is never put away.
+        last_active = max(session.last_seen, session.page.last_active) # type: ignore
+        return max(self.app.hibernate_after - (time.monotonic() - last_active), 0)
+
+    def hibernate(self, session: Session, outbox: Outbox) -> None:
+        start = time.perf_counter()
+        page, renderer = session.page, session.renderer
+
+        try:
+            self.app.hibernation.save(session.id, {
+                "scope": session.scope,
+                "params": session.params,
+                "values": [signal.value for signal in session.signals], # type: ignore
+                "last_id": renderer.last_id, # type: ignore
+                "paths": renderer.handler_paths(), # type: ignore
+            })
+        except Exception as e:
+            # Most likely a signal holding something that can't be pickled,
+            # which won't change, so the session just stays in memory.
+            print("!! EXCEPTION !!", e)
+            self.app.metrics.exception("hibernate", e)
+            session.signals = None
+            return
+
+        page.update_callback = None # type: ignore
+        session.page = session.renderer = session.signals = None
+        outbox.renderer = None
+        session.moved_ids = {}
+        session.size = 0
+
+        self.app.metrics.hibernation.observe(time.perf_counter() - start, self.route, "hibernate")
+
+    async def restore(self, session: Session, outbox: Outbox) -> None:
+        start = time.perf_counter()
+        state = self.app.hibernation.load(session.id)
+
+        # The page is built again from its handler, with the signals it
+        # creates set to the values they had before.
         page = AppCurrentPage()
-        page_info.current_page = page
+        page.signals = []
+        request = falcon.asgi.Request(state["scope"], empty_body) # type: ignore
+
+        with page_info.page_scope(page):
+            vdom = await self.app.run(self.handler, request, **state["params"])
+
+        signals, page.signals = page.signals, None
 
-        vdom = self.handler(req, **kwargs)
+        if len(signals) != len(state["values"]):
+            raise Exception("The page created different signals after it was restored.")
+
+        for signal, value in zip(signals, state["values"]):
+            signal.value = value
+
+        # New ids continue after the old ones, so an id the client still
+        # knows from before never points at a different element.
         renderer = create_renderer(vdom)
-        renderer_id = str(id(renderer))
+        renderer.last_id = state["last_id"]
 
-        self.renderers[renderer_id] = (page, renderer)
+        if self.app.tracer is not None:
+            renderer.tracer = self.app.tracer(self.route)
 
-        res.status = falcon.HTTP_200
-        res.content_type = falcon.MEDIA_HTML
+        with page_info.page_scope(page):
+            renderer.render()
+
+        paths = renderer.handler_paths()
+        session.moved_ids = {
+            node_id: paths[path] for path, node_id in state["paths"].items() if path in paths
+        }
+
+        session.page, session.renderer, session.signals = page, renderer, signals
+        session.measure()
+        self.connect(session, outbox)
+        outbox.resync(renderer)
 
-        global_styles = "".join(style.style_text for style in self.app.global_styles)
+        self.app.metrics.hibernation.observe(time.perf_counter() - start, self.route, "restore")
 
-        res.text = \
+    def document_head(self, session_id: str | None) -> str:
+        # Pages without a session have nothing to connect to, so they
+        # don't load the client either.
+        client = \
+            f'<meta name="pyweb-session" content="{session_id}">' \
+            f'<script src="{self.app.client_path}" defer></script>' \
+            if session_id is not None else ""
+
+        return \
             f'<html lang="en">' \
             f'<head>' \
-            f'<script>{get_websocket_script(renderer_id)}</script>' \
-            f'<style>{global_styles}{self.all_styles}</style>' \
+            f'{client}' \
+            f'<link rel="stylesheet" href="{self.app.stylesheet_path}">' \
             f'</head>' \
-            f'<body>' \
-            f'{renderer.render()}' \
-            f'</body>' \
-            f'</html>'
+            f'<body>'
+
+    def static_page(self, body: str) -> CachedPage:
+        document = f"{self.document_head(None)}{body}</body></html>"
+        return CachedPage(document.encode(), f'"{content_hash(document)}"')
+
+    def send_static(self, req: falcon.Request, res: falcon.Response, page: CachedPage) -> None:
+        res.etag = page.etag
+
+        if req.get_header("If-None-Match") == page.etag:
+            res.status = falcon.HTTP_304
+            return
+
+        res.status = falcon.HTTP_200
+        res.content_type = falcon.MEDIA_HTML
+        res.data = page.body
+
+    async def on_get(self, req: falcon.Request, res: falcon.Response, **kwargs: Any):
+        cache_key = tuple(sorted(kwargs.items()))
+
+        if self.cache is not None:
+            if (cached := self.cache.get(cache_key)) is not None:
+                self.app.metrics.page_cache.inc(self.route, "hit")
+                return self.send_static(req, res, cached)
+
+            self.app.metrics.page_cache.inc(self.route, "miss")
+
+        page = AppCurrentPage()
+        start = time.perf_counter()
+
+        if self.app.hibernate_after is not None:
+            page.signals = []
+
+        with page_info.page_scope(page):
+            vdom = await self.app.run(self.handler, req, **kwargs)
+
+            signals, page.signals = page.signals, None
+
+            # A page with nothing reactive in it can't ever change, so it
+            # is sent as plain html without a session.
+            if (body := compile_child(vdom, False)) is None and self.cache is not None:
+                static = create_renderer(vdom)
+                static.ids = False
+                body = static.render()
+
+                if not static.is_static():
+                    raise Exception("Only pages without signals or event handlers can be cached.")
+
+        if body is not None:
+            cached = self.static_page(body)
+
+            if self.cache is not None:
+                self.cache.put(cache_key, cached)
+
+            self.app.metrics.renders.observe(time.perf_counter() - start, self.route, "static")
+            return self.send_static(req, res, cached)
+
+        renderer = create_renderer(vdom)
+
+        if self.app.tracer is not None:
+            renderer.tracer = self.app.tracer(self.route)
+
+        # Time spent waiting on the client while streaming isn't counted.
+        elapsed = time.perf_counter() - start
+
+        session = self.app.sessions.create(page, renderer)
+
+        if signals is not None:
+            session.scope, session.params, session.signals = request_scope(req.scope), kwargs, signals # type: ignore
+
+        res.status = falcon.HTTP_200
+        res.content_type = falcon.MEDIA_HTML
+
+        head = self.document_head(session.id)
+
+        async def stream_document():
+            nonlocal elapsed
+            yield head.encode()
+
+            buffer = ""
+            chunks = renderer.render_stream()
+
+            # The page is only entered while producing a chunk, the
+            # generator is suspended in the server's context in between.
+            while True:
+                start = time.perf_counter()
+
+                with page_info.page_scope(page):
+                    chunk = next(chunks, None)
+
+                elapsed += time.perf_counter() - start
+
+                if chunk is None:
+                    break
+
+                buffer += chunk
+
+                if len(buffer) >= STREAM_CHUNK_SIZE:
+                    yield buffer.encode()
+                    buffer = ""
+
+            yield (buffer + '</body></html>').encode()
+            session.measure()
+            self.app.metrics.renders.observe(elapsed, self.route, "page")
+
+        res.stream = stream_document() # type: ignore
 
 class WebApp:
-    def __init__(self):
-        self.pages: dict[str, tuple[RouteHandler, list[Style]]] = {}
+    def __init__(
+        self,
+        max_sessions: int = 10000,
+        session_ttl: float = 60,
+        max_pending_patches: int = 1000,
+        thread_pool_size: int = 8,
+        callback_timeout: float | None = None,
+        metrics_route: str | None = None,
+        tracer: Callable[[str], Tracer] | None = None,
+        hibernate_after: float | None = None,
+        hibernation_path: str | None = None
+    ):
+        self.pages: dict[str, tuple[RouteHandler, list[Style], int]] = {}
         self.global_styles: list[Style] = []
+        self.sessions = SessionStore(max_sessions, session_ttl)
+        self.max_pending_patches = max_pending_patches
+        self.thread_pool_size = thread_pool_size
+        self.callback_timeout = callback_timeout
+        self.executor: ThreadPoolExecutor | None = None
+        self.metrics = Metrics(self.sessions)
+        self.metrics_route = metrics_route
+        self.tracer = tracer
+        self.hibernate_after = hibernate_after
+        self.hibernation = HibernationStore(hibernation_path)
+        self.stylesheet_path = ""
+        self.client_path = ""
 
     def add_global(self, style: Style):
         self.global_styles.append(style)
 
-    def page(self, route: str, uses: list[Style] = []): # type: ignore
+    def page(self, route: str, uses: list[Style] = [], cache: bool | int = False): # type: ignore
         def wrapper(func: Callable[..., WebElementChild]):
-            self.pages[route] = [func, uses] # type: ignore
+            self.pages[route] = [func, uses, DEFAULT_CACHE_SIZE if cache is True else int(cache)] # type: ignore
+            return func
 
         return wrapper # type: ignore
 
-    def listen(self, port: int, host: str = "localhost"):
+    async def run(self, funct: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if self.executor is None and getattr(funct, "pyweb_blocking", False):
+            self.executor = ThreadPoolExecutor(self.thread_pool_size, "pyweb")
+
+        return await tasks.run(funct, args, kwargs, self.executor, self.callback_timeout)
+
+    def build(self) -> App:
         app = App()
 
+        # All the css the app can use is compiled once into a stylesheet
+        # named after its contents, so browsers can cache it indefinitely.
+        stylesheet = StaticAsset(compile_styles([
+            *self.global_styles,
+            *(style for _, uses, _ in self.pages.values() for style in uses)
+        ]), "text/css")
+
+        self.stylesheet_path = f"/_pyweb/styles.{stylesheet.hash}.css"
+        app.add_route(self.stylesheet_path, stylesheet) # type: ignore
+
+        client = StaticAsset(client_script(), "text/javascript")
+        self.client_path = f"/_pyweb/client.{client.hash}.js"
+        app.add_route(self.client_path, client) # type: ignore
+
         for route in self.pages:
-            app.add_route(route, WebRequestHandler(self, self.pages[route])) # type: ignore
+            app.add_route(route, WebRequestHandler(self, self.pages[route], route)) # type: ignore
 
-        # app.add_error_handler(Exception, TestHandler().handle)
+        if self.metrics_route:
+            app.add_route(self.metrics_route, self.metrics) # type: ignore
 
-        uvicorn.run( # type: ignore
-            app,
-            host=host,
-            port=port,
-            # log_level="debug"
-        )
+        # app.add_error_handler(Exception, TestHandler().handle)
 
-def create_app():
-    return WebApp()
+        return app
+
+    def listen(self, port: int, host: str = "localhost", compression: bool = True, workers: int = 1):
+        if workers > 1:
+            return run_workers(self, host, port, compression, workers)
+
+        self.serve(compression, host=host, port=port)
+
+    def serve(self, compression: bool = True, **config: Any):
+        try:
+            uvicorn.run( # type: ignore
+                self.build(),
+                ws_per_message_deflate=compression,
+                **config,
+                # log_level="debug"
+            )
+        finally:
+            # Forked workers exit without running atexit handlers.
+            self.hibernation.close()
+
+def create_app(
+    max_sessions: int = 10000,
+    session_ttl: float = 60,
+    max_pending_patches: int = 1000,
+    thread_pool_size: int = 8,
+    callback_timeout: float | None = None,
+    metrics_route: str | None = None,
+    tracer: Callable[[str], Tracer] | None = None,
+    hibernate_after: float | None = None,
+    hibernation_path: str | None = None
+):
+    return WebApp(
+        max_sessions, session_ttl, max_pending_patches, thread_pool_size,
+        callback_timeout, metrics_route, tracer, hibernate_after, hibernation_path
+    )
@@ -0,0 +1,74 @@
+from typing import Any, Callable, TYPE_CHECKING
+from collections import deque
+from falcon.asgi.ws import WebSocket # type: ignore
+from .metrics import frame_size
+from . import protocol
+import falcon # type: ignore
+import asyncio
+
+if TYPE_CHECKING:
+    from .metrics import Metrics
+
+class Inbox:
+    def __init__(self, socket: WebSocket, metrics: "Metrics | None" = None) -> None:
+        self.socket = socket
+        self.metrics = metrics
+        self.messages: deque[list[Any]] = deque()
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.messages_dropped = 0
+
+    async def run(self, on_receive: Callable[[], None]) -> None:
+        try:
+            while not self.socket.closed:
+                text = await self.socket.receive_text()
+                if self.socket.closed: break
+
+                if self.metrics:
+                    self.metrics.frames.observe(frame_size(text), "received")
+
+                self.messages.append(protocol.decode(text))
+                self.ready.set()
+                on_receive()
+        except falcon.WebSocketDisconnected:
+            pass
+        except Exception as e:
+            print("!! EXCEPTION !!", e)
+
+            if self.metrics:
+                self.metrics.exception("receive", e)
+        finally:
+            self.closed = True
+            self.ready.set()
+
+    def is_stale(self, message: list[Any]) -> bool:
+        return any(queued[:3] == message[:3] for queued in self.messages)
+
+    async def get(self, is_latest_wins: Callable[[int, str], bool]) -> list[Any] | None:
+        while True:
+            while not self.messages:
+                if self.closed:
+                    return None
+
+                self.ready.clear()
+                await self.ready.wait()
+
+            message = self.messages.popleft()
+
+            # Messages read while a slow callback was running can already
+            # be outdated by a newer one for the same action.
+            if (
+                message[0] == protocol.TRIGGER and is_latest_wins(message[1], message[2])
+                and self.is_stale(message)
+            ):
+                self.messages_dropped += 1
+
+                if self.metrics:
+                    self.metrics.messages_dropped.inc()
+                continue
+
+            return message
+
+    def close(self) -> None:
+        self.closed = True
+        self.ready.set()
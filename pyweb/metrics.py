@@ -0,0 +1,154 @@
+from typing import Callable, Iterator, TYPE_CHECKING
+from bisect import bisect_left
+import falcon # type: ignore
+
+if TYPE_CHECKING:
+    from .sessions import SessionStore
+
+TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+
+    if extra:
+        pairs.append(extra)
+
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def format_number(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(value)
+
+def frame_size(text: str) -> int:
+    # isascii() only checks a flag on the string, most frames never need
+    # to be encoded just to be measured.
+    return len(text) if text.isascii() else len(text.encode())
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+
+        for labels, value in self.values.items():
+            yield f"{self.name}{format_labels(self.labels, labels)} {format_number(value)}"
+
+class Gauge:
+    def __init__(self, name: str, help: str, funct: Callable[[], float], kind: str = "gauge") -> None:
+        self.name = name
+        self.help = help
+        self.funct = funct
+        self.kind = kind
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield f"{self.name} {format_number(self.funct())}"
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = TIME_BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # One count per bucket, then the overflow count and the sum.
+        self.series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        if (series := self.series.get(labels)) is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 2)
+
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+
+        for labels, series in self.series.items():
+            total = 0
+
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                total += count
+                le = 'le="' + (bound if isinstance(bound, str) else format_number(bound)) + '"'
+                yield f"{self.name}_bucket{format_labels(self.labels, labels, le)} {format_number(total)}"
+
+            yield f"{self.name}_sum{format_labels(self.labels, labels)} {format_number(series[-1])}"
+            yield f"{self.name}_count{format_labels(self.labels, labels)} {format_number(total)}"
+
+class Metrics:
+    def __init__(self, sessions: "SessionStore") -> None:
+        self.renders = Histogram(
+            "pyweb_render_seconds", "Time spent rendering pages and updates.", ("route", "kind")
+        )
+        self.updates_skipped = Counter(
+            "pyweb_updates_skipped_total", "Updates that changed nothing and sent no frame.", ("route",)
+        )
+        self.callbacks = Histogram(
+            "pyweb_callback_seconds", "Time spent in event listeners.", ("route", "action")
+        )
+        self.frames = Histogram(
+            "pyweb_frame_bytes", "Size of WebSocket frames.", ("direction",), SIZE_BUCKETS
+        )
+        self.page_cache = Counter(
+            "pyweb_page_cache_total", "Lookups in the page cache of routes that use one.", ("route", "result")
+        )
+        self.hibernation = Histogram(
+            "pyweb_hibernation_seconds", "Time spent putting idle sessions on disk and restoring them.", ("route", "action")
+        )
+        self.outbox_frames = Counter(
+            "pyweb_outbox_frames_total", "Frames sent, merged into the next one or replaced by the whole page.", ("result",)
+        )
+        self.messages_dropped = Counter(
+            "pyweb_messages_dropped_total", "Events skipped because a newer one for the same element replaced them."
+        )
+        self.exceptions = Counter(
+            "pyweb_exceptions_total", "Exceptions raised while serving a WebSocket.", ("where", "type")
+        )
+
+        self.collectors = [
+            Gauge("pyweb_sessions", "Sessions kept in memory.", lambda: len(sessions)),
+            Gauge("pyweb_connected_sessions", "Sessions with an open WebSocket.",
+                lambda: sum(1 for session in sessions.sessions.values() if session.connections)),
+            Gauge("pyweb_hibernated_sessions", "Sessions kept on disk until they are used again.",
+                lambda: sum(1 for session in sessions.sessions.values() if session.hibernated)),
+            Gauge("pyweb_session_memory_bytes", "Estimated memory used by all sessions.", sessions.memory_usage),
+            Gauge("pyweb_sessions_evicted_total", "Sessions evicted to stay under max_sessions.",
+                lambda: sessions.evictions, "counter"),
+            Gauge("pyweb_sessions_expired_total", "Sessions dropped because they never connected.",
+                lambda: sessions.expirations, "counter"),
+            Gauge("pyweb_outbox_pending_patches", "Patches waiting to be sent to connected sessions.",
+                lambda: sum(session.outbox.depth for session in sessions.sessions.values() if session.outbox and not session.outbox.closed)),
+            self.renders,
+            self.updates_skipped,
+            self.callbacks,
+            self.frames,
+            self.page_cache,
+            self.hibernation,
+            self.outbox_frames,
+            self.messages_dropped,
+            self.exceptions,
+        ]
+
+    def exception(self, where: str, error: BaseException) -> None:
+        self.exceptions.inc(where, type(error).__name__)
+
+    def render(self) -> str:
+        return "\n".join(line for collector in self.collectors for line in collector.collect()) + "\n"
+
+    async def on_get(self, req: falcon.Request, res: falcon.Response):
+        res.status = falcon.HTTP_200
+        res.content_type = "text/plain; version=0.0.4; charset=utf-8"
+        res.cache_control = ["no-store"]
+        res.text = self.render()
@@ -0,0 +1,108 @@
+from typing import TYPE_CHECKING
+from falcon.asgi.ws import WebSocket # type: ignore
+from .metrics import frame_size
+from . import protocol
+import asyncio
+
+if TYPE_CHECKING:
+    from .dom import WebRenderer, Patch
+    from .metrics import Metrics
+
+class Outbox:
+    def __init__(self, socket: WebSocket, renderer: "WebRenderer", max_pending: int = 1000, metrics: "Metrics | None" = None) -> None:
+        self.socket = socket
+        self.renderer: "WebRenderer | None" = renderer
+        self.metrics = metrics
+        self.max_pending = max_pending
+        self.pending: "list[Patch]" = []
+        self.snapshot = False
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.frames_sent = 0
+        self.frames_coalesced = 0
+        self.frames_dropped = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self.pending)
+
+    def push(self, patches: "list[Patch]") -> None:
+        if self.closed or not patches:
+            return
+
+        if self.ready.is_set():
+            self.frames_coalesced += 1
+
+            if self.metrics:
+                self.metrics.outbox_frames.inc("coalesced")
+
+        self.ready.set()
+
+        if self.snapshot:
+            self.drop()
+            return
+
+        self.pending.extend(patches)
+
+        # A client that fell this far behind gets the current page in one
+        # frame instead, which is never bigger than the page itself.
+        if len(self.pending) > self.max_pending:
+            self.pending = []
+            self.snapshot = True
+            self.drop()
+
+    def drop(self) -> None:
+        self.frames_dropped += 1
+
+        if self.metrics:
+            self.metrics.outbox_frames.inc("dropped")
+
+    def resync(self, renderer: "WebRenderer") -> None:
+        # The client's page no longer matches the renderer, so whatever is
+        # pending is replaced by the whole page.
+        self.renderer = renderer
+        self.pending = []
+        self.snapshot = True
+        self.ready.set()
+
+    def take(self) -> str:
+        if self.snapshot and self.renderer is not None:
+            message = protocol.encode(protocol.UPDATE, self.renderer.snapshot())
+        else:
+            message = protocol.encode(protocol.PATCH, self.pending)
+
+        self.pending = []
+        self.snapshot = False
+        self.ready.clear()
+
+        return message
+
+    async def run(self) -> None:
+        try:
+            while not self.closed:
+                await self.ready.wait()
+
+                if self.closed or self.socket.closed:
+                    break
+
+                message = self.take()
+                await self.socket.send_text(message)
+                self.frames_sent += 1
+
+                if self.metrics:
+                    self.metrics.frames.observe(frame_size(message), "sent")
+                    self.metrics.outbox_frames.inc("sent")
+        except Exception as e:
+            print("!! EXCEPTION !!", e)
+
+            if self.metrics:
+                self.metrics.exception("send", e)
+        finally:
+            self.closed = True
+
+            if not self.socket.closed:
+                await self.socket.close()
+
+    def close(self) -> None:
+        self.closed = True
+        self.ready.set()
@@ -1,6 +1,22 @@
-from typing import TYPE_CHECKING
+from typing import Iterator, TYPE_CHECKING
+from contextvars import ContextVar
+from contextlib import contextmanager
 
 if TYPE_CHECKING:
     from .http import AppCurrentPage
 
-current_page: "AppCurrentPage | None" = None
\ No newline at end of file
+# Each request, callback and render runs with its own page, so handlers
+# can run concurrently, across awaits or in threads without sharing it.
+current_page: "ContextVar[AppCurrentPage | None]" = ContextVar("pyweb_current_page", default=None)
+
+def get_current_page() -> "AppCurrentPage | None":
+    return current_page.get()
+
+@contextmanager
+def page_scope(page: "AppCurrentPage") -> "Iterator[AppCurrentPage]":
+    token = current_page.set(page)
+
+    try:
+        yield page
+    finally:
+        current_page.reset(token)
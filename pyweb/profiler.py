@@ -0,0 +1,142 @@
+from typing import Protocol, Any, TYPE_CHECKING
+import tracemalloc
+import time
+import os
+
+if TYPE_CHECKING:
+    from .dom import DynamicNode
+
+class Tracer(Protocol):
+    def enter(self, node: "DynamicNode") -> None:
+        ...
+
+    def exit(self, node: "DynamicNode") -> None:
+        ...
+
+def source_location(source: Any) -> str:
+    # each and whether return their own wrapper, the code worth pointing
+    # at is the mapper or condition they were given.
+    if (wrapped := getattr(source, "pyweb_source", None)) is not None:
+        return f"{wrapped[0]} {source_location(wrapped[1])}"
+
+    funct = getattr(source, "__func__", source)
+
+    if (code := getattr(funct, "__code__", None)) is None:
+        return type(source).__name__
+
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class Sample:
+    __slots__ = ("calls", "total", "own", "allocated")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total = 0.0
+        self.own = 0.0
+        self.allocated = 0
+
+class Frame:
+    __slots__ = ("node", "location", "start", "children", "memory", "children_memory")
+
+    def __init__(self, node: "DynamicNode", location: str, start: float, memory: int) -> None:
+        self.node = node
+        self.location = location
+        self.start = start
+        self.children = 0.0
+        self.memory = memory
+        self.children_memory = 0
+
+class RouteTracer:
+    def __init__(self, profiler: "Profiler", route: str) -> None:
+        self.profiler = profiler
+        self.route = route
+        self.frames: list[Frame] = []
+
+    def memory(self) -> int:
+        return tracemalloc.get_traced_memory()[0] if self.profiler.memory else 0
+
+    def enter(self, node: "DynamicNode") -> None:
+        self.frames.append(Frame(node, self.profiler.locate(node.source), time.perf_counter(), self.memory()))
+
+    def exit(self, node: "DynamicNode") -> None:
+        end, memory = time.perf_counter(), self.memory()
+
+        # A node whose source raised never exits, its frame is dropped
+        # with the first outer node that does.
+        while self.frames:
+            frame = self.frames.pop()
+
+            if frame.node is node:
+                break
+        else:
+            return
+
+        total = end - frame.start
+        allocated = memory - frame.memory
+
+        if self.frames:
+            self.frames[-1].children += total
+            self.frames[-1].children_memory += allocated
+
+        stack = ";".join([self.route, *(parent.location for parent in self.frames), frame.location])
+        self.profiler.record(self.route, frame.location, stack, total, total - frame.children, allocated - frame.children_memory)
+
+class Profiler:
+    def __init__(self, memory: bool = False) -> None:
+        self.memory = memory
+        self.samples: dict[tuple[str, str], Sample] = {}
+        self.stacks: dict[str, float] = {}
+        self.locations: dict[int, str] = {}
+
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def __call__(self, route: str) -> RouteTracer:
+        return RouteTracer(self, route)
+
+    def locate(self, source: Any) -> str:
+        code = getattr(getattr(source, "__func__", source), "__code__", None)
+
+        if code is None or hasattr(source, "pyweb_source"):
+            return source_location(source)
+
+        if (location := self.locations.get(id(code))) is None:
+            location = self.locations[id(code)] = source_location(source)
+
+        return location
+
+    def record(self, route: str, location: str, stack: str, total: float, own: float, allocated: int) -> None:
+        if (sample := self.samples.get((route, location))) is None:
+            sample = self.samples[(route, location)] = Sample()
+
+        sample.calls += 1
+        sample.total += total
+        sample.own += own
+        sample.allocated += allocated
+        self.stacks[stack] = self.stacks.get(stack, 0) + own
+
+    def report(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "route": route,
+                "location": location,
+                "calls": sample.calls,
+                "total_seconds": sample.total,
+                "own_seconds": sample.own,
+                "allocated_bytes": sample.allocated if self.memory else None,
+            }
+            for (route, location), sample in sorted(self.samples.items(), key=lambda item: -item[1].own)
+        ]
+
+    def flamegraph(self) -> str:
+        # Collapsed stacks weighted by microseconds of own time, the input
+        # format of flamegraph.pl, speedscope and inferno.
+        return "".join(
+            f"{stack} {round(own * 1e6)}\n"
+            for stack, own in sorted(self.stacks.items()) if round(own * 1e6) > 0
+        )
+
+    def reset(self) -> None:
+        self.samples = {}
+        self.stacks = {}
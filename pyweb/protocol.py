@@ -0,0 +1,40 @@
+from typing import Any
+import json
+
+# Bumped whenever the message format changes, clients running an older
+# runtime are turned away instead of misreading messages.
+PROTOCOL_VERSION = 1
+
+# Client to server
+TRIGGER = 0
+
+# Server to client
+UPDATE = 0
+PATCH = 1
+
+# Patch operations
+TEXT = 0
+ATTR = 1
+INSERT = 2
+REPLACE = 3
+REMOVE = 4
+MOVE = 5
+
+def encode(action: int, payload: Any) -> str:
+    return json.dumps([action, payload], separators=(",", ":"), ensure_ascii=False)
+
+def decode(text: str) -> list[Any]:
+    message = json.loads(text)
+
+    if type(message) != list or not message or type(message[0]) != int:
+        raise Exception("Invalid message.")
+
+    # Triggers are looked up by node id and action name, anything else in
+    # those places can't be used as a key.
+    if message[0] == TRIGGER and (
+        len(message) not in (3, 4) or type(message[1]) != int or type(message[2]) != str
+        or (len(message) == 4 and type(message[3]) != list)
+    ):
+        raise Exception("Invalid trigger.")
+
+    return message
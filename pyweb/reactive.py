@@ -0,0 +1,155 @@
+from typing import TypeVar, Generic, Callable, Iterable, Iterator, Any
+from collections import deque
+from .signals import Signal
+
+T = TypeVar("T")
+K = TypeVar("K")
+V = TypeVar("V")
+
+MAX_CHANGES = 256
+
+# A list change replaces `removed` at `index` with `inserted`, every list
+# operation can be described as one of these.
+ListChange = tuple[int, list[Any], list[Any]]
+
+class ChangeLog(Generic[T]):
+    def __init__(self) -> None:
+        self.changes: deque[T] = deque(maxlen=MAX_CHANGES)
+
+    def record(self, change: T) -> None:
+        self.changes.append(change)
+
+    def reset(self) -> None:
+        self.changes.clear()
+
+    def since(self, version: int, current: int) -> list[T] | None:
+        # None means the changes are no longer known and whoever asked has
+        # to look at the whole value again.
+        if not 0 <= current - version <= len(self.changes):
+            return None
+
+        return list(self.changes)[len(self.changes) - (current - version):]
+
+class ReactiveList(Signal[list[T]], Generic[T]):
+    def __init__(self, initial: Iterable[T] = ()) -> None:
+        super().__init__(list(initial))
+        self.log: ChangeLog[ListChange] = ChangeLog()
+
+    def __call__(self, new_value: Callable[[list[T]], list[T]]) -> None:
+        # The function may have changed the list in place, so a write
+        # through it always counts as a change to the whole list.
+        self.value = list(new_value(self.value))
+        self.version += 1
+        self.log.reset()
+        self.page.dispatch(self.notify)
+
+    def changes_since(self, version: int) -> list[ListChange] | None:
+        return self.log.since(version, self.version)
+
+    def splice(self, index: int, delete_count: int, *items: T) -> list[T]:
+        index = max(len(self.value) + index, 0) if index < 0 else min(index, len(self.value))
+        removed = self.value[index:index + delete_count]
+        self.value[index:index + delete_count] = items
+
+        if removed or items:
+            self.version += 1
+            self.log.record((index, removed, list(items)))
+            self.page.dispatch(self.notify)
+
+        return removed
+
+    def append(self, item: T) -> None:
+        self.splice(len(self.value), 0, item)
+
+    def extend(self, items: Iterable[T]) -> None:
+        self.splice(len(self.value), 0, *items)
+
+    def insert(self, index: int, item: T) -> None:
+        self.splice(index, 0, item)
+
+    def pop(self, index: int = -1) -> T:
+        if not self.value:
+            raise IndexError("pop from empty list")
+
+        return self.splice(range(len(self.value))[index], 1)[0]
+
+    def remove(self, item: T) -> None:
+        self.splice(self.value.index(item), 1)
+
+    def clear(self) -> None:
+        self.splice(0, len(self.value))
+
+    def __setitem__(self, index: int, item: T) -> None:
+        self.splice(range(len(self.value))[index], 1, item)
+
+    def __delitem__(self, index: int) -> None:
+        self.splice(range(len(self.value))[index], 1)
+
+    def __getitem__(self, index: int) -> T:
+        return self.get()[index]
+
+    def __len__(self) -> int:
+        return len(self.get())
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.get())
+
+    def __contains__(self, item: object) -> bool:
+        return item in self.get()
+
+class ReactiveDict(Signal[dict[K, V]], Generic[K, V]):
+    def __init__(self, initial: dict[K, V] | None = None) -> None:
+        super().__init__(dict(initial or {}))
+
+    def __call__(self, new_value: Callable[[dict[K, V]], dict[K, V]]) -> None:
+        self.value = dict(new_value(self.value))
+        self.changed()
+
+    def changed(self) -> None:
+        self.version += 1
+        self.page.dispatch(self.notify)
+
+    def __setitem__(self, key: K, value: V) -> None:
+        if key in self.value and self.value[key] is value:
+            return
+
+        self.value[key] = value
+        self.changed()
+
+    def __delitem__(self, key: K) -> None:
+        del self.value[key]
+        self.changed()
+
+    def pop(self, key: K, *default: V) -> V:
+        if key not in self.value:
+            return self.value.pop(key, *default)
+
+        value = self.value.pop(key)
+        self.changed()
+        return value
+
+    def update(self, other: dict[K, V]) -> None:
+        for key, value in other.items():
+            self[key] = value
+
+    def clear(self) -> None:
+        for key in list(self.value):
+            del self[key]
+
+    def __getitem__(self, key: K) -> V:
+        return self.get()[key]
+
+    def __len__(self) -> int:
+        return len(self.get())
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self.get())
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.get()
+
+def reactive_list(initial: Iterable[T] = ()) -> ReactiveList[T]:
+    return ReactiveList(initial)
+
+def reactive_dict(initial: dict[K, V] | None = None) -> ReactiveDict[K, V]:
+    return ReactiveDict(initial)
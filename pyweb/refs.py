@@ -1,4 +1,5 @@
-from . import page_info
+from .signals import Derived
+from . import page_info, tracking
 from typing import TypeVar, Generic, Callable
 
 T = TypeVar("T")
@@ -6,16 +7,20 @@ class Ref(Generic[T]):
     def __init__(self, initial: T) -> None:
         self.value = initial
 
-        if not page_info.current_page:
+        if not (page := page_info.get_current_page()):
             raise Exception("Refs should only be used inside a page handler.")
 
+        if page.signals is not None:
+            page.signals.append(self)
+
     def __call__(self, new_value: Callable[[T], T]) -> None:
         self.value = new_value(self.value)
 
     def like(self, transformer: Callable[[T], T]) -> Callable[..., T]:
-        return lambda: transformer(self.value)
+        return Derived(self, transformer)
     
     def get(self) -> T:
+        tracking.track(self)
         return self.value
 
 U = TypeVar("U")
@@ -0,0 +1,120 @@
+from typing import Callable, Any, TYPE_CHECKING
+from collections import OrderedDict
+import secrets
+import time
+
+if TYPE_CHECKING:
+    from .http import AppCurrentPage
+    from .dom import WebRenderer
+    from .outbox import Outbox
+    from .signals import Signal
+    from .refs import Ref
+
+class Session:
+    def __init__(self, id: str, page: "AppCurrentPage", renderer: "WebRenderer") -> None:
+        self.id = id
+        self.page: "AppCurrentPage | None" = page
+        self.renderer: "WebRenderer | None" = renderer
+        self.created = time.monotonic()
+        self.last_seen = self.created
+        self.connections = 0
+        self.size = 0
+        self.close_callback: Callable[[], None] | None = None
+        self.outbox: "Outbox | None" = None
+        # What a hibernated session needs to be built again, the signals
+        # and refs are the ones its page handler created, in that order.
+        self.scope: dict[str, Any] = {}
+        self.params: dict[str, Any] = {}
+        self.signals: "list[Signal[Any] | Ref[Any]] | None" = None
+        self.moved_ids: dict[int, int] = {}
+
+    @property
+    def hibernated(self) -> bool:
+        return self.renderer is None
+
+    def on_close(self, funct: Callable[[], None]) -> None:
+        self.close_callback = funct
+
+    def measure(self) -> int:
+        self.size = self.renderer.memory_usage() if self.renderer else 0
+        return self.size
+
+    def close(self) -> None:
+        if self.close_callback:
+            self.close_callback()
+
+class SessionStore:
+    def __init__(self, max_sessions: int = 10000, ttl: float = 60, prefix: str = "") -> None:
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.prefix = prefix
+        self.sessions: OrderedDict[str, Session] = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def create(self, page: "AppCurrentPage", renderer: "WebRenderer") -> Session:
+        self.collect()
+
+        while (session_id := self.prefix + secrets.token_urlsafe(12)) in self.sessions:
+            pass
+
+        session = Session(session_id, page, renderer)
+        self.sessions[session_id] = session
+
+        while len(self.sessions) > self.max_sessions:
+            self.evict(session)
+
+        return session
+
+    def evict(self, keep: Session) -> None:
+        # Pages that were rendered but never connected go first, a session
+        # with an open WebSocket is only dropped when there's nothing else.
+        evicted = next(
+            (session for session in self.sessions.values() if session.connections == 0 and session is not keep),
+            None
+        )
+
+        if evicted is None:
+            evicted = next(iter(self.sessions.values()))
+
+        del self.sessions[evicted.id]
+        self.evictions += 1
+        evicted.close()
+
+    def get(self, session_id: str) -> Session | None:
+        if not (session := self.sessions.get(session_id)):
+            return None
+
+        self.touch(session)
+        return session
+
+    def touch(self, session: Session) -> None:
+        session.last_seen = time.monotonic()
+
+        if session.id in self.sessions:
+            self.sessions.move_to_end(session.id)
+
+    def remove(self, session_id: str) -> None:
+        self.sessions.pop(session_id, None)
+
+    def collect(self) -> None:
+        now = time.monotonic()
+
+        # Sessions are kept in the order they were last used, so the
+        # first one that hasn't expired yet ends the search.
+        for session in list(self.sessions.values()):
+            if now - session.last_seen <= self.ttl:
+                break
+
+            if session.connections == 0:
+                del self.sessions[session.id]
+                self.expirations += 1
+
+    def memory_usage(self, refresh: bool = False) -> int:
+        if refresh:
+            return sum(session.measure() for session in self.sessions.values())
+
+        return sum(session.size for session in self.sessions.values())
@@ -1,29 +1,201 @@
-from . import page_info
-from typing import TypeVar, Generic, Callable
+from . import page_info, tracking
+from typing import TypeVar, Generic, Callable, Iterator, Any, TYPE_CHECKING
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+if TYPE_CHECKING:
+    from .http import AppCurrentPage
+    from .refs import Ref
+
+batched_pages: "ContextVar[list[AppCurrentPage] | None]" = ContextVar("pyweb_batched_pages", default=None)
 
 T = TypeVar("T")
+U = TypeVar("U")
+
 class Signal(Generic[T]):
     def __init__(self, initial: T) -> None:
         self.value = initial
 
-        if not page_info.current_page:
+        if not (page := page_info.get_current_page()):
             raise Exception("Signals should only be used inside a page handler.")
         
-        self.page = page_info.current_page
+        self.page = page
+        self.observers: set[tracking.Observer] = set()
+        self.version = 0
+
+        if page.signals is not None:
+            page.signals.append(self)
 
     def __call__(self, new_value: Callable[[T], T]) -> None:
         old_value = self.value
         self.value = new_value(self.value)
 
-        if old_value != self.value:
-            self.page.rerender()
+        if old_value is not self.value and old_value != self.value:
+            self.version += 1
+            self.page.dispatch(self.notify)
+
+    def unobserve(self, observer: tracking.Observer) -> None:
+        self.observers.discard(observer)
+
+    def notify(self) -> None:
+        for observer in list(self.observers):
+            observer.invalidate()
+
+        if (pages := batched_pages.get()) is not None:
+            if self.page not in pages:
+                pages.append(self.page)
+        else:
+            self.page.invalidate()
 
     def like(self, transformer: Callable[[T], T]) -> Callable[..., T]:
-        return lambda: transformer(self.value)
+        return Derived(self, transformer)
     
     def get(self) -> T:
+        tracking.track(self)
         return self.value
 
-U = TypeVar("U")
+class Derived(Generic[T]):
+    __slots__ = ("source", "transformer")
+
+    def __init__(self, source: "Signal[Any] | Ref[Any] | Computed[Any]", transformer: Callable[[Any], T]) -> None:
+        self.source = source
+        self.transformer = transformer
+
+    def __call__(self) -> T:
+        return self.transformer(self.source.get())
+
+    @property
+    def pyweb_source(self) -> tuple[str, Callable[[Any], T]]:
+        return ("like", self.transformer)
+
+CLEAN, CHECK, DIRTY = 0, 1, 2
+
+class Computed(Generic[T]):
+    def __init__(self, funct: Callable[[], T]) -> None:
+        if not (page := page_info.get_current_page()):
+            raise Exception("Computed values should only be used inside a page handler.")
+
+        self.funct = funct
+        self.page = page
+        self.value: T | None = None
+        self.state = DIRTY
+        self.version = 0
+        self.volatile = False
+        self.sources: "dict[Signal[Any] | Computed[Any], int]" = {}
+        self.observers: set[tracking.Observer] = set()
+
+    def track(self, source: Any) -> None:
+        if isinstance(source, Signal) or isinstance(source, Computed):
+            if source not in self.sources:
+                self.sources[source] = source.version
+                source.observers.add(self)
+
+            if isinstance(source, Computed) and source.volatile:
+                self.volatile = True
+        else:
+            self.volatile = True
+
+    def invalidate(self) -> None:
+        self.mark(DIRTY)
+
+    def check(self) -> None:
+        self.mark(CHECK)
+
+    def mark(self, state: int) -> None:
+        # Changes are only pushed as far as marking everything downstream,
+        # values are pulled when read. A value that depends on the same
+        # signal twice over different paths is computed once, after every
+        # path is up to date, so it never sees a mix of old and new values.
+        if self.state >= state:
+            return
+
+        was_clean = self.state == CLEAN
+        self.state = state
+
+        if was_clean:
+            for observer in list(self.observers):
+                observer.check()
+
+    def refresh(self) -> None:
+        if self.state == CHECK:
+            self.state = CLEAN
+
+            for source, version in self.sources.items():
+                if isinstance(source, Computed):
+                    source.refresh()
+
+                if source.version != version:
+                    self.state = DIRTY
+                    break
+
+        if self.state == DIRTY or self.volatile:
+            self.recompute()
+
+    def release(self) -> None:
+        for source in self.sources:
+            source.unobserve(self)
+
+        self.sources = {}
+        self.volatile = False
+
+    def unobserve(self, observer: tracking.Observer) -> None:
+        self.observers.discard(observer)
+
+        # Nothing reads this value anymore, so it stops listening to its
+        # own sources until it is read again.
+        if not self.observers and self.sources:
+            self.release()
+            self.state = DIRTY
+
+    def recompute(self) -> None:
+        stale = self.sources
+        self.sources = {}
+        self.volatile = False
+
+        value = tracking.observe(self, self.funct)
+        self.state = CLEAN
+
+        # Sources are only let go of once the new ones are known, a source
+        # that is still read never loses its last observer and its value.
+        for source in stale:
+            if source not in self.sources:
+                source.unobserve(self)
+
+        if self.version == 0 or value != self.value:
+            self.value = value
+            self.version += 1
+
+    def get(self) -> T:
+        self.refresh()
+        tracking.track(self)
+        return self.value # type: ignore
+
+    def like(self, transformer: Callable[[T], U]) -> Callable[..., U]:
+        return Derived(self, transformer)
+
+    @property
+    def pyweb_source(self) -> tuple[str, Callable[[], T]]:
+        return ("computed", self.funct)
+
 def signal(initial: U) -> Signal[U]:
-    return Signal(initial)
\ No newline at end of file
+    return Signal(initial)
+
+def computed(funct: Callable[[], U]) -> Computed[U]:
+    return Computed(funct)
+
+@contextmanager
+def batch() -> Iterator[None]:
+    if batched_pages.get() is not None:
+        yield
+        return
+
+    pages: "list[AppCurrentPage]" = []
+    token = batched_pages.set(pages)
+
+    try:
+        yield
+    finally:
+        batched_pages.reset(token)
+
+        for page in pages:
+            page.rerender()
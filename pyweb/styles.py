@@ -1,12 +1,18 @@
 from typing import TypeAlias
-from .signals import Signal
+from .signals import Signal, Computed
 from .refs import Ref
+import hashlib
 
-StylesheetValue: TypeAlias = "None | str | int | Signal[StylesheetValue] | Ref[StylesheetValue] | list[StylesheetValue] | Stylesheet"
+StylesheetValue: TypeAlias = "None | str | int | Signal[StylesheetValue] | Ref[StylesheetValue] | Computed[StylesheetValue] | list[StylesheetValue] | Stylesheet"
 Stylesheet: TypeAlias = "dict[str, StylesheetValue]"
 
+CLASS_PLACEHOLDER = "\0"
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()[:12]
+
 def stylesheet_value_to_string(value: StylesheetValue) -> str:
-    if isinstance(value, Signal) or isinstance(value, Ref):
+    if isinstance(value, Signal) or isinstance(value, Ref) or isinstance(value, Computed):
         return stylesheet_value_to_string(value.get())
     
     if value is None:
@@ -44,11 +50,11 @@ class Style:
         self.class_name = None
 
         if not is_global:
-            self.class_name = "style-" + str(id(self))
-            self.style_text = stylesheet_to_string(
-                stylesheet,
-                f".{self.class_name}"
-            )
+            # Classes are named after their compiled css, so identical
+            # styles end up sharing a single rule.
+            template = stylesheet_to_string(stylesheet, CLASS_PLACEHOLDER)
+            self.class_name = "style-" + content_hash(template)
+            self.style_text = template.replace(CLASS_PLACEHOLDER, f".{self.class_name}")
         else:
             self.style_text = stylesheet_to_string(stylesheet, "")
 
@@ -63,6 +69,17 @@ class Style:
         for style in styles: combined.update(style.raw)
         return Style(combined)
 
+def compile_styles(styles: list[Style]) -> str:
+    seen: set[str] = set()
+    text = ""
+
+    for style in styles:
+        if style.style_text not in seen:
+            seen.add(style.style_text)
+            text += style.style_text
+
+    return text
+
 def style(stylesheet: Stylesheet) -> Style:
     return Style(stylesheet)
 
@@ -0,0 +1,75 @@
+from typing import Callable, Any, TypeVar
+from concurrent.futures import Executor
+from functools import wraps, partial
+import contextvars
+import inspect
+import asyncio
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+def mark(funct: Callable[..., Any], **attributes: Any) -> Any:
+    if inspect.iscoroutinefunction(funct):
+        @wraps(funct)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            return await funct(*args, **kwargs)
+
+        wrapper: Any = async_wrapper
+    else:
+        @wraps(funct)
+        def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
+            return funct(*args, **kwargs)
+
+        wrapper = sync_wrapper
+
+    wrapper.__dict__.update(attributes)
+    return wrapper
+
+def blocking(funct: Callable[..., Any] | None = None, *, timeout: float | None = None) -> Any:
+    def wrapper(funct: F) -> F:
+        if inspect.iscoroutinefunction(funct):
+            raise Exception("Only synchronous functions can be marked as blocking.")
+
+        return mark(funct, pyweb_blocking=True, pyweb_timeout=timeout)
+
+    if funct is None:
+        return wrapper
+
+    return wrapper(funct)
+
+def timeout(seconds: float) -> Callable[[F], F]:
+    def wrapper(funct: F) -> F:
+        # A synchronous function on the event loop can't be interrupted,
+        # so it is moved to the thread pool where it can be waited on.
+        return mark(funct, pyweb_blocking=not inspect.iscoroutinefunction(funct), pyweb_timeout=seconds)
+
+    return wrapper
+
+def is_async(funct: Callable[..., Any]) -> bool:
+    return inspect.iscoroutinefunction(funct) or getattr(funct, "pyweb_blocking", False)
+
+async def run(
+    funct: Callable[..., Any],
+    args: Any,
+    kwargs: dict[str, Any],
+    executor: Executor | None,
+    default_timeout: float | None
+) -> Any:
+    seconds = getattr(funct, "pyweb_timeout", None) or default_timeout
+
+    if getattr(funct, "pyweb_blocking", False):
+        # The worker thread gets a copy of the caller's context, so the
+        # current page is still known to signals created over there.
+        context = contextvars.copy_context()
+        result = asyncio.get_running_loop().run_in_executor(
+            executor, partial(context.run, funct, *args, **kwargs)
+        )
+    else:
+        result = funct(*args, **kwargs)
+
+    if not inspect.isawaitable(result):
+        return result
+
+    try:
+        return await asyncio.wait_for(result, seconds)
+    except asyncio.TimeoutError:
+        raise Exception(f"{getattr(funct, '__qualname__', funct)} timed out after {seconds}s.")
@@ -0,0 +1,26 @@
+from typing import Protocol, Any
+from contextvars import ContextVar
+
+class Observer(Protocol):
+    def track(self, source: Any) -> None:
+        ...
+
+    def invalidate(self) -> None:
+        ...
+
+    def check(self) -> None:
+        ...
+
+current_observer: "ContextVar[Observer | None]" = ContextVar("pyweb_current_observer", default=None)
+
+def track(source: Any) -> None:
+    if (observer := current_observer.get()) is not None:
+        observer.track(source)
+
+def observe(observer: "Observer | None", funct: Any) -> Any:
+    token = current_observer.set(observer)
+
+    try:
+        return funct()
+    finally:
+        current_observer.reset(token)
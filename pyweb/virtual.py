@@ -0,0 +1,77 @@
+from typing import TypeVar, Callable, Hashable, Any
+from .signals import Signal, Computed, signal, computed
+from .refs import Ref
+from .events import throttle
+from .html import WebElement, WebElementChild, div
+from .each import ItemMapper, CacheEntry
+
+T = TypeVar("T")
+
+SCROLL_INTERVAL = 0.05
+
+def visible_window(top: int, viewport: int, total: int, row_height: int, overscan: int) -> tuple[int, int]:
+    start = min(max(top // row_height - overscan, 0), total)
+    end = min((top + viewport) // row_height + 1 + overscan, total)
+    return start, max(start, end)
+
+def virtual_each(
+    items: Signal[list[T]] | Ref[list[T]] | Computed[list[T]],
+    mapper: Callable[[T], WebElementChild] | Callable[[T, int], WebElementChild],
+    row_height: int,
+    height: int = 400,
+    overscan: int = 10,
+    key: Callable[[T], Hashable] | None = None,
+    **attributes: Any
+) -> WebElement:
+    if "onscroll" in attributes:
+        raise Exception("virtual_each listens to scrolling itself, onscroll can't be passed to it.")
+
+    # The box has to keep its height and scroll, so those come after
+    # whatever style the caller passed.
+    style = attributes.pop("style", None)
+    style = f"{style};" if style else ""
+
+    map_item = ItemMapper(mapper)
+    scroll: Signal[tuple[int, int]] = signal((0, height))
+    cache: dict[Hashable, CacheEntry[T]] = {}
+
+    # Only crossing into another row moves the window, scrolling within
+    # a row leaves everything that depends on it alone.
+    window = computed(lambda: visible_window(*scroll.get(), len(items.get()), row_height, overscan))
+
+    @throttle(SCROLL_INTERVAL)
+    def on_scroll(top: float, viewport: float) -> None:
+        scroll(lambda _: (max(int(top), 0), int(viewport)))
+
+    def rows():
+        nonlocal cache
+
+        # Rows are keyed by their index unless a key function is given,
+        # rows that stay in view are only mapped again if their item changed.
+        start, end = window.get()
+        current = items.get()
+        next_cache: dict[Hashable, CacheEntry[T]] = {}
+        outputs: list[WebElementChild] = []
+
+        for index in range(start, end):
+            item = current[index]
+            row_key = index if key is None else key(item)
+            entry = next_cache[row_key] = map_item.keyed(item, index, cache.get(row_key), row_key)
+            outputs.append(entry[2])
+
+        cache = next_cache
+        return tuple(outputs)
+
+    def spacer(count: Callable[[], int]) -> Callable[[], WebElement]:
+        return lambda: div(style=f"height:{count() * row_height}px")
+
+    rows.pyweb_source = ("virtual_each", mapper) # type: ignore
+
+    return div(
+        spacer(lambda: window.get()[0]),
+        rows,
+        spacer(lambda: len(items.get()) - window.get()[1]),
+        style=f"{style}height:{height}px;overflow-y:auto",
+        onscroll=on_scroll,
+        **attributes
+    )
@@ -1,24 +1,27 @@
 from typing import TypeVar, Callable
-from .signals import Signal
+from .signals import Signal, Computed
 from .refs import Ref
 from .html import WebElementChild
 
 T = TypeVar("T")
 
 def whether(
-    condition: bool | Signal[bool] | Ref[bool] | Callable[..., bool],
+    condition: bool | Signal[bool] | Ref[bool] | Computed[bool] | Callable[..., bool],
     truthy: Callable[[], WebElementChild],
     falsy: Callable[[], WebElementChild] | None = None,
 ) -> Callable[[], WebElementChild]:
+    # The branch is handed to the renderer as is instead of being called,
+    # so it is only built again when the condition flips and keeps its
+    # own reactive state in the meantime.
     def inner():
-        if isinstance(condition, Signal) or isinstance(condition, Ref):
-            if condition.get(): return truthy()
+        if isinstance(condition, Signal) or isinstance(condition, Ref) or isinstance(condition, Computed):
+            if condition.get(): return truthy
         elif callable(condition):
-            if condition(): return truthy()
+            if condition(): return truthy
         else:
-            if condition: return truthy()
+            if condition: return truthy
         
-        if falsy: return falsy()
-        return None
-    
-    return inner
\ No newline at end of file
+        return falsy
+
+    inner.pyweb_source = ("whether", condition) # type: ignore
+    return inner
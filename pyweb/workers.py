@@ -0,0 +1,150 @@
+from typing import TypeAlias, TYPE_CHECKING
+from urllib.parse import urlsplit, parse_qs
+import multiprocessing
+import tempfile
+import asyncio
+import shutil
+import signal
+import sys
+import os
+
+if TYPE_CHECKING:
+    from .http import WebApp
+
+Upstream: TypeAlias = "str | tuple[str, int]"
+
+MAX_HEAD_SIZE = 64 * 1024
+CONNECT_ATTEMPTS = 50
+BAD_GATEWAY = b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+def session_prefix(worker: int) -> str:
+    # "." never appears in the random part of a session id.
+    return f"{worker}."
+
+def locate(session_id: str | None, workers: int) -> int | None:
+    worker, separator, _ = (session_id or "").partition(".")
+
+    if separator and worker.isdigit() and int(worker) < workers:
+        return int(worker)
+
+    return None
+
+def close_after_response(head: bytes) -> bytes:
+    lines = [
+        line for line in head[:-4].split(b"\r\n")
+        if not line.lower().startswith(b"connection:")
+    ]
+
+    return b"\r\n".join([*lines, b"Connection: close"]) + b"\r\n\r\n"
+
+async def open_upstream(upstream: Upstream) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    # Workers may still be starting up when the first requests arrive.
+    for attempt in range(CONNECT_ATTEMPTS):
+        try:
+            if isinstance(upstream, str):
+                return await asyncio.open_unix_connection(upstream)
+
+            return await asyncio.open_connection(*upstream)
+        except OSError:
+            if attempt == CONNECT_ATTEMPTS - 1:
+                raise
+
+            await asyncio.sleep(0.1)
+
+    raise Exception("Unreachable")
+
+async def pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while data := await reader.read(64 * 1024):
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+class Proxy:
+    def __init__(self, upstreams: list[Upstream]) -> None:
+        self.upstreams = upstreams
+        self.next_worker = 0
+
+    def route(self, head: bytes) -> int:
+        target = head.split(b"\r\n", 1)[0].split(b" ")[1].decode("latin-1")
+        session_id = parse_qs(urlsplit(target).query).get("id", [None])[0]
+
+        if (worker := locate(session_id, len(self.upstreams))) is not None:
+            return worker
+
+        self.next_worker = (self.next_worker + 1) % len(self.upstreams)
+        return self.next_worker
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            worker = self.route(head)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, IndexError, ConnectionError):
+            writer.close()
+            return
+
+        # Only the first request of a connection is routed, so plain
+        # requests don't keep the connection open for the next one,
+        # which might be a socket that belongs to a different worker.
+        if b"upgrade: websocket" not in head.lower():
+            head = close_after_response(head)
+
+        try:
+            upstream_reader, upstream_writer = await open_upstream(self.upstreams[worker])
+        except OSError as e:
+            print("!! EXCEPTION !!", e)
+            writer.write(BAD_GATEWAY)
+            writer.close()
+            return
+
+        upstream_writer.write(head)
+
+        await asyncio.gather(
+            pipe(reader, upstream_writer),
+            pipe(upstream_reader, writer)
+        )
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEAD_SIZE)
+
+        async with server:
+            await server.serve_forever()
+
+def serve_worker(app: "WebApp", worker: int, path: str, compression: bool) -> None:
+    app.sessions.prefix = session_prefix(worker)
+    app.serve(compression, uds=path)
+
+def run_workers(app: "WebApp", host: str, port: int, compression: bool, workers: int) -> None:
+    directory = tempfile.mkdtemp(prefix="pyweb-")
+    paths: list[Upstream] = [os.path.join(directory, f"worker-{i}.sock") for i in range(workers)]
+
+    # Workers are forked so they start with the pages and styles the app
+    # registered, every session then lives in the worker that served its
+    # page and the proxy sends the session's socket back to it.
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=serve_worker, args=(app, i, path, compression), daemon=True)
+        for i, path in enumerate(paths)
+    ]
+
+    for process in processes:
+        process.start()
+
+    # Stopping the proxy must also stop the workers it started.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    try:
+        asyncio.run(Proxy(paths).serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+
+        for process in processes:
+            process.join()
+
+        shutil.rmtree(directory, ignore_errors=True)